@@ -0,0 +1,107 @@
+"""Broadcast throughput of the shared channel layer as worker processes grow.
+
+Every worker process opens its own RedisPubSubChannelLayer and puts one
+subscriber in each of ``--groups`` location groups, the way one caregiver
+socket per tracked user would sit on each Daphne worker. A publisher then
+group_sends ``--messages`` updates round-robin over the groups, and each is
+delivered once per worker.
+
+    python bench_channel_layer.py --redis-url redis://localhost:6379 --workers 1 2 4 8
+
+Without ``--redis-url`` an embedded fakeredis server is started. It is far
+slower than Redis, so only use it to check the fan-out works.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from channels_redis.pubsub import RedisPubSubChannelLayer
+
+
+async def _subscribe(redis_url, groups, messages, ready, results):
+    layer = RedisPubSubChannelLayer(hosts=[redis_url])
+    channels = []
+    for g in range(groups):
+        channel = await layer.new_channel()
+        await layer.group_add(f"location_{g}", channel)
+        channels.append(channel)
+    await asyncio.sleep(0.2)
+    ready.set()
+
+    received = 0
+    last = None
+
+    async def drain(channel):
+        nonlocal received, last
+        while True:
+            await layer.receive(channel)
+            received += 1
+            last = time.time()
+
+    tasks = [asyncio.create_task(drain(channel)) for channel in channels]
+    while received < messages:
+        before = received
+        await asyncio.sleep(2)
+        if received == before and received:
+            break
+    for task in tasks:
+        task.cancel()
+    results.put((received, last))
+    await layer.flush()
+
+
+def worker(redis_url, groups, messages, ready, results):
+    asyncio.run(_subscribe(redis_url, groups, messages, ready, results))
+
+
+async def publish(redis_url, groups, messages):
+    layer = RedisPubSubChannelLayer(hosts=[redis_url])
+    start = time.time()
+    for i in range(messages):
+        await layer.group_send(f"location_{i % groups}", {"type": "send_location", "latitude": 12.97, "longitude": 77.59})
+    published = time.time()
+    await layer.flush()
+    return start, published
+
+
+def run(redis_url, workers, groups, messages):
+    ready = [multiprocessing.Event() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(redis_url, groups, messages, event, results)) for event in ready]
+    for proc in procs:
+        proc.start()
+    for event in ready:
+        event.wait(60)
+
+    start, published = asyncio.run(publish(redis_url, groups, messages))
+    received = [results.get(timeout=120) for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    delivered = sum(count for count, _ in received)
+    finished = max(last for _, last in received if last) if delivered else published
+    elapsed = finished - start
+    print(f"{workers:>7} {messages / (published - start):>12.0f} {delivered:>10} {delivered / elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    redis_url = args.redis_url
+    if redis_url is None:
+        from fakeredis import TcpFakeServer
+
+        server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        redis_url = "redis://127.0.0.1:%d" % server.server_address[1]
+
+    print(f"{'workers':>7} {'publish/s':>12} {'delivered':>10} {'delivered/s':>14}")
+    for workers in args.workers:
+        run(redis_url, workers, args.groups, args.messages)
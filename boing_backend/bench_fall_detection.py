@@ -0,0 +1,68 @@
+"""Throughput of the vectorized fall detector, in samples/sec on one core.
+
+Builds ``--windows`` windows of ``--seconds`` of 3-axis accelerometer data
+at ``--rate`` Hz (a few percent containing a fall), then times
+stack_windows() (turning the JSON-shaped lists into an array) and
+detect_falls() separately, as the /fall-detection/ endpoint runs them.
+
+    python bench_fall_detection.py --windows 2000 --seconds 4 --rate 50
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+
+import numpy as np  # noqa: E402
+
+from fall_detection.detector import GRAVITY, detect_falls, stack_windows  # noqa: E402
+
+
+def synthetic(windows, samples, rate, fall_ratio, rng):
+    accel = rng.normal(0, 0.3, (windows, samples, 3)).astype(np.float32)
+    accel[:, :, 2] += GRAVITY
+    falls = rng.random(windows) < fall_ratio
+    at = rate  # free fall from 1 s, impact at 1.3 s, still afterwards
+    accel[falls, at:at + int(0.3 * rate)] = [0.0, 0.0, 1.0]
+    accel[falls, at + int(0.3 * rate)] = [0.0, 0.0, 25.0]
+    accel[falls, at + int(0.3 * rate) + 1:] = [0.0, 0.0, GRAVITY]
+    return accel, falls
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=4.0)
+    parser.add_argument("--rate", type=int, default=50)
+    parser.add_argument("--fall-ratio", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    samples = int(args.seconds * args.rate)
+    accel, falls = synthetic(args.windows, samples, args.rate, args.fall_ratio, rng)
+    lengths = np.full(args.windows, samples)
+    as_lists = accel.tolist()
+    total = args.windows * samples
+
+    stack_time, _ = best_of(args.repeat, lambda: stack_windows(as_lists))
+    detect_time, (fallen, _, _) = best_of(args.repeat, lambda: detect_falls(accel, lengths, args.rate))
+
+    print(f"{args.windows} windows x {samples} samples ({total} samples), {int(falls.sum())} with a fall")
+    print(f"detected {int(fallen.sum())} falls, {int((fallen & falls).sum())} of them true")
+    print(f"stack_windows   {stack_time * 1000:>8.1f} ms {total / stack_time:>14.0f} samples/s")
+    print(f"detect_falls    {detect_time * 1000:>8.1f} ms {total / detect_time:>14.0f} samples/s")
+    print(f"end to end      {(stack_time + detect_time) * 1000:>8.1f} ms "
+          f"{total / (stack_time + detect_time):>14.0f} samples/s")
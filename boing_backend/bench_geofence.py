@@ -0,0 +1,79 @@
+"""Per-ping geofence evaluation cost with thousands of fences.
+
+Builds a GeofenceIndex with ``--users`` users, each with ``--fences`` random
+circles and polygons scattered over a city, then times evaluate() for
+random-walk pings. Also times a single user holding all the fences, the
+worst case for one lookup.
+
+    python bench_geofence.py --users 1000 --fences 5 --pings 200000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+
+from live_track.geofence import CircleFence, GeofenceIndex, PolygonFence  # noqa: E402
+
+CITY = (12.97, 77.59)
+SPREAD = 0.2
+
+
+def random_fence(rng, fence_id):
+    lat = CITY[0] + rng.uniform(-SPREAD, SPREAD)
+    lon = CITY[1] + rng.uniform(-SPREAD, SPREAD)
+    if fence_id % 2:
+        return CircleFence(fence_id, "circle", lat, lon, rng.uniform(50, 2000))
+    sides = rng.randint(4, 12)
+    size = rng.uniform(0.001, 0.02)
+    vertices = [
+        (lat + size * math.sin(2 * math.pi * i / sides), lon + size * math.cos(2 * math.pi * i / sides))
+        for i in range(sides)
+    ]
+    return PolygonFence(fence_id, "polygon", vertices)
+
+
+def run(label, index, user_ids, pings, rng):
+    positions = {u: [CITY[0] + rng.uniform(-SPREAD, SPREAD), CITY[1] + rng.uniform(-SPREAD, SPREAD)] for u in user_ids}
+    schedule = []
+    for _ in range(pings):
+        user_id = rng.choice(user_ids)
+        position = positions[user_id]
+        position[0] += rng.uniform(-0.0005, 0.0005)
+        position[1] += rng.uniform(-0.0005, 0.0005)
+        schedule.append((user_id, position[0], position[1]))
+
+    transitions = 0
+    start = time.perf_counter()
+    for user_id, latitude, longitude in schedule:
+        transitions += len(index.evaluate(user_id, latitude, longitude))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {1e6 * elapsed / pings:>8.2f} us/ping {pings / elapsed:>12.0f} pings/s {transitions:>8} transitions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--fences", type=int, default=5, help="Fences per user.")
+    parser.add_argument("--pings", type=int, default=200000)
+    parser.add_argument("--cell-size", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    index = GeofenceIndex(cell_size=args.cell_size)
+    user_ids = [str(u) for u in range(args.users)]
+    fence_id = 0
+    for user_id in user_ids:
+        fences = []
+        for _ in range(args.fences):
+            fences.append(random_fence(rng, fence_id))
+            fence_id += 1
+        index.load(user_id, fences)
+    run(f"{args.users} users x {args.fences} fences", index, user_ids, args.pings, rng)
+
+    single = GeofenceIndex(cell_size=args.cell_size)
+    single.load("0", [random_fence(rng, i) for i in range(args.users * args.fences)])
+    run(f"1 user x {args.users * args.fences} fences", single, ["0"], args.pings, rng)
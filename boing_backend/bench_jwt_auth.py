@@ -0,0 +1,74 @@
+"""Authenticated request throughput with and without the JWT user cache.
+
+Runs ``--requests`` GETs against SOSConfigView for ``--users`` users (spread
+round-robin) in a throwaway test database, authenticating with plain
+JWTAuthentication (one user query per request) and then with
+CachedJWTAuthentication. Reports requests/sec and queries per request.
+
+    python bench_jwt_auth.py --requests 5000 --users 100
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boing.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_databases, teardown_databases  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework_simplejwt.authentication import JWTAuthentication  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from authing.authentication import CachedJWTAuthentication, user_cache  # noqa: E402
+from authing.models import User  # noqa: E402
+from caregivers.models import SOSConfig  # noqa: E402
+from caregivers.views import SOSConfigView  # noqa: E402
+
+
+def run(label, auth_class, requests, headers):
+    view = SOSConfigView.as_view(authentication_classes=[auth_class])
+    factory = APIRequestFactory()
+    user_cache.clear()
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for i in range(requests):
+            response = view(factory.get("/caregiver/edit-config/", HTTP_AUTHORIZATION=headers[i % len(headers)]))
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - start
+    print(f"{label:<10} {requests / elapsed:>12.0f} {len(queries) / requests:>14.2f}")
+
+
+def main(args):
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        users = User.objects.bulk_create([
+            User(name=f"User {i}", phone=f"9{i:09d}", email=f"user{i}@example.com", role="elderly")
+            for i in range(args.users)
+        ])
+        SOSConfig.objects.bulk_create([SOSConfig(user=user) for user in users])
+        headers = [f"Bearer {AccessToken.for_user(user)}" for user in users]
+
+        print(f"{'auth':<10} {'requests/s':>12} {'queries/req':>14}")
+        run("uncached", JWTAuthentication, args.requests, headers)
+        run("cached", CachedJWTAuthentication, args.requests, headers)
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100)
+    main(parser.parse_args())
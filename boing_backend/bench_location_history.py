@@ -0,0 +1,110 @@
+"""Range-query latency for per-point UserLocation vs bucketed LocationBucket.
+
+Loads a synthetic history into a scratch MongoDB database (both layouts),
+then times "user X between T and T+window" queries three ways: per-point
+documents without an index (what production did before), per-point with the
+(user_id, timestamp) index, and buckets via live_track.buckets.points_between.
+Needs a running MongoDB; the target database is dropped first.
+
+    python bench_location_history.py --mongo-uri mongodb://localhost:27017/boing_bench \\
+        --users 200 --days 7 --interval 10 --window 3600
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boing.settings")
+
+
+def load(users, days, interval):
+    from live_track.buckets import append_points
+    from live_track.models import LocationBucket, UserLocation
+
+    legacy = UserLocation._get_collection()
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    total = 0
+    began = time.perf_counter()
+    for u in range(users):
+        user_id = str(u)
+        points = [
+            (user_id, 12.9 + random.random() / 10, 77.5 + random.random() / 10, start + datetime.timedelta(seconds=s))
+            for s in range(0, days * 86400, interval)
+        ]
+        legacy.insert_many(
+            [{"user_id": p[0], "latitude": p[1], "longitude": p[2], "timestamp": p[3]} for p in points], ordered=False
+        )
+        for i in range(0, len(points), 5000):
+            append_points(points[i:i + 5000])
+        total += len(points)
+    print(f"loaded {total} points for {users} users in {time.perf_counter() - began:.1f}s")
+
+    db = legacy.database
+    for name, collection in (("per-point", legacy), ("buckets", LocationBucket._get_collection())):
+        stats = db.command("collStats", collection.name)
+        print(f"  {name:<10} {stats['count']:>10} docs {stats['size'] / 2**20:>8.1f} MiB data "
+              f"{stats['totalIndexSize'] / 2**20:>7.1f} MiB indexes")
+    return start
+
+
+def time_queries(label, run, queries):
+    latencies = []
+    returned = 0
+    for user_id, since, until in queries:
+        began = time.perf_counter()
+        returned += sum(1 for _ in run(user_id, since, until))
+        latencies.append(time.perf_counter() - began)
+    latencies.sort()
+    print(f"{label:<22} {1000 * statistics.median(latencies):>9.2f} {1000 * latencies[int(len(latencies) * 0.95) - 1]:>9.2f}"
+          f" {returned / len(queries):>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/boing_bench")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=10, help="Seconds between synthetic points.")
+    parser.add_argument("--window", type=int, default=3600, help="Query range in seconds.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-scan", action="store_true", help="Skip the unindexed collection-scan case.")
+    args = parser.parse_args()
+
+    os.environ["MONGODB_URI"] = args.mongo_uri
+    import django
+
+    django.setup()
+    import mongoengine
+
+    from live_track.buckets import points_between
+    from live_track.models import UserLocation
+
+    mongoengine.get_db().client.drop_database(mongoengine.get_db().name)
+    random.seed(0)
+    start = load(args.users, args.days, args.interval)
+
+    queries = []
+    for _ in range(args.queries):
+        since = start + datetime.timedelta(seconds=random.randrange(0, args.days * 86400 - args.window))
+        queries.append((str(random.randrange(args.users)), since, since + datetime.timedelta(seconds=args.window)))
+
+    legacy = UserLocation._get_collection()
+
+    def per_point(hint):
+        def run(user_id, since, until):
+            return legacy.find(
+                {"user_id": user_id, "timestamp": {"$gte": since, "$lt": until}},
+                {"latitude": 1, "longitude": 1, "timestamp": 1, "_id": 0},
+                sort=[("timestamp", 1)],
+            ).hint(hint)
+        return run
+
+    print(f"{'layout':<22} {'p50 ms':>9} {'p95 ms':>9} {'points/q':>10}")
+    if not args.skip_scan:
+        time_queries("per-point, no index", per_point([("$natural", 1)]), queries[:max(1, args.queries // 20)])
+    time_queries("per-point, indexed", per_point([("user_id", 1), ("timestamp", 1)]), queries)
+    time_queries("buckets", points_between, queries)
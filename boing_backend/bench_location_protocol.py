@@ -0,0 +1,101 @@
+"""Bytes and serialization time per location update, JSON vs binary.
+
+Encodes and decodes ``--points`` updates with each wire format the live
+location socket speaks, one point per frame and in batches of ``--batch``,
+and prints the payload size and round-trip throughput. msgpack is included
+for comparison when it is installed.
+
+    python bench_location_protocol.py --points 100000 --batch 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+
+from live_track import protocol  # noqa: E402
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def json_single(points):
+    frames = [json.dumps({"lat": lat, "lon": lon, "timestamp": ts, "accuracy": acc}) for lat, lon, ts, acc in points]
+    for frame in frames:
+        protocol.decode_json(frame)
+    return frames
+
+
+def json_batch(points, batch):
+    frames = [
+        json.dumps([{"lat": lat, "lon": lon, "timestamp": ts, "accuracy": acc} for lat, lon, ts, acc in points[i:i + batch]])
+        for i in range(0, len(points), batch)
+    ]
+    for frame in frames:
+        json.loads(frame)
+    return frames
+
+
+def binary_single(points):
+    frames = [protocol.encode_point(*point) for point in points]
+    for frame in frames:
+        for _ in protocol.decode_points(frame):
+            pass
+    return frames
+
+
+def binary_batch(points, batch):
+    frames = [b"".join(protocol.encode_point(*point) for point in points[i:i + batch]) for i in range(0, len(points), batch)]
+    for frame in frames:
+        for _ in protocol.decode_points(frame):
+            pass
+    return frames
+
+
+def msgpack_single(points):
+    frames = [msgpack.packb(point) for point in points]
+    for frame in frames:
+        msgpack.unpackb(frame)
+    return frames
+
+
+def msgpack_batch(points, batch):
+    frames = [msgpack.packb(points[i:i + batch]) for i in range(0, len(points), batch)]
+    for frame in frames:
+        msgpack.unpackb(frame)
+    return frames
+
+
+def run(name, fn, points):
+    start = time.perf_counter()
+    frames = fn(points)
+    elapsed = time.perf_counter() - start
+    size = sum(len(frame) for frame in frames)
+    print(f"{name:<22} {size / len(points):>10.1f} {len(points) / elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    points = [
+        (12.9 + rng.random() / 10, 77.5 + rng.random() / 10, 1700000000000 + i * 1000, round(rng.uniform(3, 30), 1))
+        for i in range(args.points)
+    ]
+
+    print(f"{'format':<22} {'bytes/upd':>10} {'updates/s':>14}")
+    run("json", json_single, points)
+    run(f"json x{args.batch}", lambda p: json_batch(p, args.batch), points)
+    run("binary", binary_single, points)
+    run(f"binary x{args.batch}", lambda p: binary_batch(p, args.batch), points)
+    if msgpack is not None:
+        run("msgpack", msgpack_single, points)
+        run(f"msgpack x{args.batch}", lambda p: msgpack_batch(p, args.batch), points)
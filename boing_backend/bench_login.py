@@ -0,0 +1,75 @@
+"""Login throughput (password checks/sec) against the hashing pool size.
+
+Runs ``--logins`` concurrent password checks the way LoginView does, first
+inline on the event loop (the old path) and then through authing.hashing
+with 1, 2, 4, ... worker processes up to the core count. Alongside each run
+a ticker measures the longest event-loop stall, which is what every other
+request on the same Daphne worker would wait.
+
+    python bench_login.py --logins 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boing.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import check_password, make_password  # noqa: E402
+
+from authing import hashing  # noqa: E402
+
+
+async def ticker(stop, stalls):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.005)
+        now = time.perf_counter()
+        stalls.append(now - last - 0.005)
+        last = now
+
+
+async def run(label, check, logins, encoded):
+    stop, stalls = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, stalls))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(check("s3cret-pass", encoded) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    assert all(valid for valid, _ in results)
+    print(f"{label:<14} {logins / elapsed:>10.1f} {1000 * max(stalls, default=0):>14.1f}")
+
+
+async def inline_check(raw_password, encoded):
+    return check_password(raw_password, encoded), None
+
+
+async def main(args):
+    encoded = make_password("s3cret-pass")
+    print(f"{'workers':<14} {'logins/s':>10} {'max stall ms':>14}")
+    await run("inline", inline_check, args.logins, encoded)
+
+    workers = 1
+    while workers <= args.max_workers:
+        settings.PASSWORD_HASH_WORKERS = workers
+        hashing._executor = None
+        # Warm the pool so process start-up isn't counted.
+        await asyncio.gather(*(hashing.acheck_password("x", encoded) for _ in range(workers)))
+        await run(f"pool x{workers}", hashing.acheck_password, args.logins, encoded)
+        hashing.get_executor().shutdown()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    asyncio.run(main(parser.parse_args()))
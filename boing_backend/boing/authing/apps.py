@@ -6,4 +6,5 @@ class AuthingConfig(AppConfig):
     name = "authing"
 
     def ready(self):
-        import authing.models
\ No newline at end of file
+        import authing.models
+        import authing.signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+
+class UserCache:
+    """A small LRU of User rows keyed by id, each entry living ``ttl`` seconds.
+
+    It holds field values rather than instances, and every hit builds a
+    fresh User. Cached relations or attributes set by one request therefore
+    never leak into another.
+
+    ``generation`` counts evictions. Pass the value read before loading a
+    user to ``set``, and the user is only cached if nothing was evicted in
+    between, so a load that raced a change cannot bring back the old row.
+    """
+
+    def __init__(self, max_size=10000, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fields = [field.attname for field in User._meta.concrete_fields]
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+        return User.from_db("default", self._fields, entry[1])
+
+    def set(self, user_id, user, generation=None):
+        values = [getattr(user, name) for name in self._fields]
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+user_cache = UserCache(max_size=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+# Saves and deletes are announced here so every worker process evicts the user.
+USER_CHANGES_GROUP = "auth_user_changes"
+
+
+async def watch():
+    """Evicts users changed in other processes from this process's cache, forever.
+
+    boing.asgi starts it in every worker.
+    """
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    await layer.group_add(USER_CHANGES_GROUP, channel)
+    try:
+        while True:
+            event = await layer.receive(channel)
+            if event.get("type") == "user_changed":
+                user_cache.invalidate(event["user_id"])
+    finally:
+        await layer.group_discard(USER_CHANGES_GROUP, channel)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that looks users up in ``user_cache`` before the database.
+
+    Saving or deleting a User evicts it here at once and, through ``watch``,
+    in every other worker once the change commits (see authing.signals).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        generation = user_cache.generation
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, generation)
+            return user
+
+        # Same checks super() runs on a freshly loaded user.
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
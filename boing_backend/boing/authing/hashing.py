@@ -0,0 +1,66 @@
+"""Password hashing on a process pool, so PBKDF2 never runs on the event loop.
+
+Login and registration await these instead of calling make_password /
+check_password inline. The pool is bounded by PASSWORD_HASH_WORKERS, so a
+login burst queues here rather than starving every other request, and it
+scales with cores because each worker is a separate process.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup(set_prefix=False)
+
+
+def _make_password(raw_password):
+    from django.contrib.auth.hashers import make_password
+
+    return make_password(raw_password)
+
+
+def _check_password(raw_password, encoded):
+    """Returns ``(valid, upgraded)``; ``upgraded`` is a fresh hash when the stored one is outdated."""
+    from django.contrib.auth.hashers import check_password, make_password
+
+    upgraded = []
+    valid = check_password(raw_password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            # Spawned, not forked: the server process has threads and open sockets.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+        )
+    return _executor
+
+
+def make_passwords(raw_passwords):
+    """Hashes many passwords across the pool, in order. For bulk imports."""
+    raw_passwords = list(raw_passwords)
+    chunksize = max(1, min(64, len(raw_passwords) // (settings.PASSWORD_HASH_WORKERS * 4)))
+    return list(get_executor().map(_make_password, raw_passwords, chunksize=chunksize))
+
+
+async def amake_password(raw_password):
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _make_password, raw_password)
+
+
+async def acheck_password(raw_password, encoded):
+    """``(valid, upgraded_hash_or_None)`` for ``raw_password`` against ``encoded``."""
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _check_password, raw_password, encoded)
@@ -0,0 +1,102 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authing.hashing import make_passwords
+from authing.models import User
+from authing.serializers import UserSerializer
+
+FIELDS = ("name", "phone", "email", "role", "password", "emergency_contact")
+
+
+def load_rows(path, fmt):
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "json":
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise CommandError("JSON input must be a list of user objects")
+            return rows
+        return list(csv.DictReader(f))
+
+
+def existing(field, values, chunk=500):
+    """Which of ``values`` are already taken in ``field``, a few hundred per query."""
+    values = list(values)
+    taken = set()
+    for i in range(0, len(values), chunk):
+        taken.update(User.objects.filter(**{f"{field}__in": values[i:i + chunk]}).values_list(field, flat=True))
+    return taken
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-creates elderly users and caregivers from a CSV (with a header row) or JSON list with the "
+        "fields name, phone, email, role, password, emergency_contact. Elderly users are linked to the "
+        "caregiver whose phone is their emergency_contact."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        fmt = format or ("json" if path.lower().endswith(".json") else "csv")
+        rows = load_rows(path, fmt)
+        start = time.perf_counter()
+
+        valid, skipped = [], 0
+        for number, row in enumerate(rows, start=1):
+            serializer = UserSerializer(data={k: row.get(k) for k in FIELDS if row.get(k) not in (None, "")})
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                skipped += 1
+                self.stderr.write(f"Row {number}: {json.dumps(serializer.errors)}")
+
+        taken_emails = existing("email", {data["email"] for data in valid})
+        taken_phones = existing("phone", {data["phone"] for data in valid})
+        new = []
+        for data in valid:
+            if data["email"] in taken_emails or data["phone"] in taken_phones:
+                skipped += 1
+                self.stderr.write(f"{data['email']}: email or phone already registered")
+                continue
+            taken_emails.add(data["email"])
+            taken_phones.add(data["phone"])
+            new.append(data)
+
+        caregiver_phones = {data["phone"] for data in new if data["role"] == "caregiver"}
+        contacts = {data.get("emergency_contact") for data in new} - caregiver_phones - {None, ""}
+        caregiver_phones |= existing("phone", contacts)
+        for data in new:
+            if data["role"] == "elderly" and data.get("emergency_contact") not in caregiver_phones:
+                self.stderr.write(f"{data['email']}: no caregiver with phone {data.get('emergency_contact')} yet")
+
+        hash_start = time.perf_counter()
+        hashed = make_passwords(data["password"] for data in new)
+        insert_start = time.perf_counter()
+
+        users = [
+            User(
+                name=data["name"],
+                phone=data["phone"],
+                email=data["email"],
+                role=data["role"],
+                emergency_contact=data.get("emergency_contact", ""),
+                password=password,
+            )
+            for data, password in zip(new, hashed)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=batch_size)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(users)} users ({skipped} skipped) in {elapsed:.2f}s: "
+            f"{len(users) / max(elapsed, 1e-9):.0f} rows/s "
+            f"(hashing {insert_start - hash_start:.2f}s, insert {time.perf_counter() - insert_start:.2f}s)"
+        ))
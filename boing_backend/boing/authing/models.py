@@ -45,8 +45,8 @@ class User(AbstractBaseUser):
     REQUIRED_FIELDS = ["name", "phone", "role"]
 
     def set_password(self, raw_password):
+        # Callers save; saving here made every registration write twice.
         self.password = make_password(raw_password)
-        self.save()
 
     def check_password(self, raw_password):
         return check_password(raw_password, self.password)
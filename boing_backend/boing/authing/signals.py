@@ -0,0 +1,20 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import USER_CHANGES_GROUP, user_cache
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    """Evicts the user here now and, once committed, in every other worker."""
+    user_id = str(instance.pk)
+    user_cache.invalidate(user_id)
+
+    def notify():
+        async_to_sync(get_channel_layer().group_send)(USER_CHANGES_GROUP, {"type": "user_changed", "user_id": user_id})
+
+    transaction.on_commit(notify)
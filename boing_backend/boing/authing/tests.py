@@ -1,3 +1,174 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from caregivers.config import sos_configs
+from caregivers.models import SOSConfig
+from .authentication import USER_CHANGES_GROUP, user_cache, watch
+from .models import User
+from .serializers import UserSerializer
+
+
+class AuthViewsTestCase(TestCase):
+    def register(self, **overrides):
+        data = {
+            "name": "Gran",
+            "phone": "9000000002",
+            "email": "gran@example.com",
+            "role": "elderly",
+            "password": "s3cret-pass",
+            "emergency_contact": "9000000001",
+        }
+        data.update(overrides)
+        return self.client.post("/register/", data, content_type="application/json")
+
+    def login(self, password, email="gran@example.com"):
+        return self.client.post("/login/", {"email": email, "password": password}, content_type="application/json")
+
+    def test_register_then_login(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("token", response.json())
+        self.assertTrue(User.objects.get(email="gran@example.com").password.startswith("pbkdf2_sha256$"))
+
+        response = self.login("s3cret-pass")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["emergency_contact"], "9000000001")
+
+    def test_rejects_bad_credentials(self):
+        self.register()
+        self.assertEqual(self.login("wrong").status_code, 401)
+        self.assertEqual(self.login("s3cret-pass", email="nobody@example.com").status_code, 401)
+
+    def test_register_validates(self):
+        response = self.register(emergency_contact="")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("emergencyContact", response.json())
+
+    def test_login_upgrades_outdated_hashes(self):
+        User.objects.create(
+            name="Gran", phone="9000000002", email="gran@example.com", role="elderly",
+            password=make_password("s3cret-pass", hasher="pbkdf2_sha1"),
+        )
+        self.assertEqual(self.login("s3cret-pass").status_code, 200)
+        self.assertTrue(User.objects.get(email="gran@example.com").password.startswith("pbkdf2_sha256$"))
+
+
+class UserCreationTestCase(TestCase):
+    def test_registration_is_one_write(self):
+        with self.assertNumQueries(1):
+            User.objects.create_user("Carer", "9000000001", "carer@example.com", "pw", "caregiver")
+
+        serializer = UserSerializer(data={
+            "name": "Gran", "phone": "9000000002", "email": "gran@example.com", "role": "elderly",
+            "password": "pw", "emergency_contact": "9000000001",
+        })
+        self.assertTrue(serializer.is_valid())
+        with self.assertNumQueries(1):
+            serializer.save()
+
+    def test_import_users(self):
+        User.objects.create(name="Existing", phone="9000000009", email="existing@example.com", role="caregiver")
+        rows = [
+            {"name": "Carer", "phone": "9000000001", "email": "carer@example.com", "role": "caregiver", "password": "a"},
+            {"name": "Gran", "phone": "9000000002", "email": "gran@example.com", "role": "elderly",
+             "password": "b", "emergency_contact": "9000000001"},
+            {"name": "Grandad", "phone": "9000000003", "email": "grandad@example.com", "role": "elderly",
+             "password": "c", "emergency_contact": "9000000009"},
+            {"name": "No contact", "phone": "9000000004", "email": "nc@example.com", "role": "elderly", "password": "d"},
+            {"name": "Dup", "phone": "9000000005", "email": "existing@example.com", "role": "caregiver", "password": "e"},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(rows, f)
+        self.addCleanup(os.unlink, f.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_users", f.name, stdout=out, stderr=err)
+        self.assertIn("Imported 3 users (2 skipped)", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+        gran = User.objects.get(email="gran@example.com")
+        self.assertTrue(check_password("b", gran.password))
+        self.assertEqual(
+            set(User.objects.filter(role="elderly").values_list("email", flat=True)),
+            {"gran@example.com", "grandad@example.com"},
+        )
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        sos_configs.clear()
+        self.addCleanup(user_cache.clear)
+        self.addCleanup(sos_configs.clear)
+        self.user = User.objects.create(name="Gran", phone="9000000002", email="gran@example.com", role="elderly")
+        SOSConfig.objects.create(user=self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def test_repeat_requests_skip_the_user_query(self):
+        self.assertEqual(self.client.get("/caregiver/edit-config/", **self.auth).status_code, 200)
+        with self.assertNumQueries(0):  # user and SOSConfig both cached
+            response = self.client.get("/caregiver/edit-config/", **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_saving_a_user_evicts_it(self):
+        self.client.get("/caregiver/edit-config/", **self.auth)
+        self.user.name = "Granny"
+        self.user.save()
+        with self.assertNumQueries(1):  # the user is loaded again
+            self.client.get("/caregiver/edit-config/", **self.auth)
+        self.assertEqual(user_cache.get(str(self.user.pk)).name, "Granny")
+
+    def test_loads_that_race_an_eviction_are_not_cached(self):
+        load = JWTAuthentication.get_user
+
+        def load_then_evict(auth, validated_token):
+            user = load(auth, validated_token)
+            user_cache.invalidate(str(self.user.pk))  # saved by another request meanwhile
+            return user
+
+        with mock.patch.object(JWTAuthentication, "get_user", load_then_evict):
+            self.assertEqual(self.client.get("/caregiver/edit-config/", **self.auth).status_code, 200)
+        self.assertIsNone(user_cache.get(str(self.user.pk)))
+
+    def test_deleted_users_are_rejected(self):
+        self.client.get("/caregiver/edit-config/", **self.auth)
+        self.user.delete()
+        self.assertEqual(self.client.get("/caregiver/edit-config/", **self.auth).status_code, 401)
+
+    def test_changes_are_announced_to_other_workers(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(USER_CHANGES_GROUP, channel)
+        self.addCleanup(async_to_sync(layer.group_discard), USER_CHANGES_GROUP, channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(async_to_sync(layer.receive)(channel), {"type": "user_changed", "user_id": str(self.user.pk)})
+
+
+class UserCacheWatchTestCase(SimpleTestCase):
+    async def test_watch_evicts_users_changed_elsewhere(self):
+        self.addCleanup(user_cache.clear)
+        user_cache.set("42", User(pk=42, name="Gran", phone="9000000002", email="gran@example.com", role="elderly"))
+        task = asyncio.create_task(watch())
+        await asyncio.sleep(0.05)  # joins the group
+
+        await get_channel_layer().group_send(USER_CHANGES_GROUP, {"type": "user_changed", "user_id": "42"})
+        for _ in range(100):
+            if user_cache.get("42") is None:
+                break
+            await asyncio.sleep(0.01)
+        self.assertIsNone(user_cache.get("42"))
+        task.cancel()
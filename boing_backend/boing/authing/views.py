@@ -1,44 +1,86 @@
-from rest_framework.response import Response
-from rest_framework.views import APIView
+import json
+
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from .models import User
 from .serializers import UserSerializer, get_tokens_for_user
-from django.contrib.auth.hashers import check_password
+from .hashing import acheck_password, amake_password
+
+
+def request_data(request):
+    if request.content_type == "application/json":
+        return json.loads(request.body or b"{}")
+    return request.POST.dict()
 
-import json
-class RegisterView(APIView):
-    def post(self, request):
 
-        serializer = UserSerializer(data=request.data)
+# These are plain async Django views rather than DRF APIViews so the
+# password hashing can be awaited on the process pool instead of holding the
+# one thread Daphne runs sync views on.
+@method_decorator(csrf_exempt, name="dispatch")
+class RegisterView(View):
+    async def post(self, request):
+        try:
+            data = request_data(request)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = UserSerializer(data=data)
         if serializer.is_valid():
-            user = serializer.save()
+            validated = serializer.validated_data
+            user = User(
+                name=validated["name"],
+                phone=validated["phone"],
+                email=validated.get("email", ""),
+                role=validated.get("role", ""),
+                emergency_contact=validated.get("emergency_contact", ""),
+                password=await amake_password(validated["password"]),
+            )
+            await user.asave()
             token = get_tokens_for_user(user)
-            return Response({"token": token['jwt']}, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({"token": token['jwt']}, status=status.HTTP_201_CREATED)
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class LoginView(APIView):
-    def post(self, request):
-        data = request.data
+@method_decorator(csrf_exempt, name="dispatch")
+class LoginView(View):
+    async def post(self, request):
+        try:
+            data = request_data(request)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST)
         email = data.get("email")
-        password = data.get("password")
+        password = data.get("password") or ""
 
-        user = User.objects.filter(email=email).first()
+        user = await User.objects.filter(email=email).afirst()
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            await amake_password(password)
+            return JsonResponse({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        if user and check_password(password, user.password):
-            token = get_tokens_for_user(user)
-            return Response({
-                "token": token['jwt'],
-                "user": {
-                    "name": user.name,
-                    "phone": user.phone,
-                    "email": user.email,
-                    "role": user.role,
-                    "emergency_contact":user.emergency_contact
-                }
-            }, status=status.HTTP_200_OK)
+        valid, upgraded = await acheck_password(password, user.password)
+        if not valid:
+            return JsonResponse({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # The stored hash used an old hasher or iteration count; replace it
+        # now that we have the raw password.
+        if upgraded:
+            user.password = upgraded
+            await user.asave(update_fields=["password"])
 
-        return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+        token = get_tokens_for_user(user)
+        return JsonResponse({
+            "token": token['jwt'],
+            "user": {
+                "name": user.name,
+                "phone": user.phone,
+                "email": user.email,
+                "role": user.role,
+                "emergency_contact":user.emergency_contact
+            }
+        }, status=status.HTTP_200_OK)
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -1,11 +1,21 @@
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from live_track.routing import websocket_urlpatterns
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boing.settings")
+# Set up Django before importing anything that touches models.
+django_asgi_app = get_asgi_application()
 
-application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": URLRouter(websocket_urlpatterns),
-})
\ No newline at end of file
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from authing import authentication  # noqa: E402
+from boing.watchers import StartWatchers  # noqa: E402
+from caregivers import config as sos_config  # noqa: E402
+from live_track.middleware import JWTAuthMiddleware  # noqa: E402
+from live_track.routing import websocket_urlpatterns  # noqa: E402
+
+application = StartWatchers(
+    ProtocolTypeRouter({
+        "http": django_asgi_app,
+        "websocket": JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+    }),
+    [authentication.watch, sos_config.watch],
+)
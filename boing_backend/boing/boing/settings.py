@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
     "authing",
     "caregivers",
     "live_track",
+    "fall_detection",
 ]
 
 MIDDLEWARE = [
@@ -132,7 +134,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = { 
     'DEFAULT_AUTHENTICATION_CLASSES': [ 
-        'rest_framework_simplejwt.authentication.JWTAuthentication', 
+        'authing.authentication.CachedJWTAuthentication', 
     ], 
 }
 SIMPLE_JWT = {
@@ -146,8 +148,78 @@ SIMPLE_JWT = {
 }
 
 ASGI_APPLICATION = "boing.asgi.application"
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# With REDIS_URL set, group_send fans out through Redis pub/sub to every
+# Daphne worker process and the cache (presence) is shared between them;
+# without it both only work inside one process.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {
+                "hosts": [REDIS_URL],
+            },
+        }
     }
-}
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/boing")
+
+# Location pings are buffered and bulk-inserted by live_track.writer.
+LOCATION_FLUSH_INTERVAL_MS = 200
+LOCATION_FLUSH_BATCH_SIZE = 500
+LOCATION_MAX_PENDING = 10000
+
+# Per-user coalescing in LiveLocationConsumer: points closer than
+# LOCATION_MIN_DISTANCE_M to the last published one are dropped, and at most
+# one point (the latest) is published per LOCATION_MIN_INTERVAL_MS. Only
+# published points are stored, and only when LOCATION_STORE_TRAIL is on.
+LOCATION_MIN_INTERVAL_MS = 1000
+LOCATION_MIN_DISTANCE_M = 5.0
+LOCATION_STORE_TRAIL = True
+
+# Client timestamps decide which bucket a point lands in and when it expires,
+# so points recorded more than LOCATION_MAX_AGE_S ago (phones flush what they
+# buffered offline) or LOCATION_MAX_CLOCK_SKEW_S in the future are rejected.
+LOCATION_MAX_AGE_S = 7 * 86400
+LOCATION_MAX_CLOCK_SKEW_S = 300
+
+# Stored trails are packed into one LocationBucket document per user per
+# LOCATION_BUCKET_SECONDS, and buckets expire LOCATION_RETENTION_DAYS after
+# their last point.
+LOCATION_BUCKET_SECONDS = 3600
+LOCATION_RETENTION_DAYS = 90
+
+# The caregiver socket (ws/caregiver/) sends at most this many batched
+# location frames per second, each with the latest point per tracked user.
+LOCATION_FANIN_FPS = 2
+
+# Presence and last known position (live_track.presence), kept in the cache.
+# A connection counts as online until LOCATION_PRESENCE_TIMEOUT seconds pass
+# without a ping, so counts left behind by a crashed worker expire.
+LOCATION_PRESENCE_TIMEOUT = 300
+LOCATION_LAST_KNOWN_TTL = 7 * 86400
+
+# Processes that hash passwords for login and registration (authing.hashing).
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+# CachedJWTAuthentication keeps up to AUTH_USER_CACHE_SIZE users for
+# AUTH_USER_CACHE_TTL seconds. Saves and deletes evict the user in every worker
+# over the channel layer; the TTL is the backstop if a notification is lost.
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TTL = 60
+
+# Seconds a process trusts its cached SOSConfig (caregivers.config) when no
+# change has been pushed to it; saves in the same process evict immediately.
+SOS_CONFIG_CACHE_TTL = 300
@@ -6,4 +6,6 @@ from rest_framework_simplejwt import views as jwt_views
 urlpatterns = [ 
     path('', include('authing.urls')), 
     path('caregiver/', include('caregivers.urls')),
+    path('location/', include('live_track.urls')),
+    path('fall-detection/', include('fall_detection.urls')),
 ] 
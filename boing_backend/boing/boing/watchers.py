@@ -0,0 +1,29 @@
+"""Per-process listeners that keep local caches in step with other workers.
+
+Daphne sends no lifespan events, so ``StartWatchers`` starts them on the
+first connection or request a worker handles, and restarts any that stopped.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartWatchers:
+    def __init__(self, application, watchers):
+        self.application = application
+        self.watchers = watchers
+        self.tasks = {}
+
+    def start(self):
+        for watch in self.watchers:
+            task = self.tasks.get(watch)
+            if task is None or task.done():
+                if task is not None and not task.cancelled() and task.exception() is not None:
+                    logger.error("%s stopped; restarting", watch.__qualname__, exc_info=task.exception())
+                self.tasks[watch] = asyncio.get_running_loop().create_task(watch())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            self.start()
+        return await self.application(scope, receive, send)
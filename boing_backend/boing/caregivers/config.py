@@ -0,0 +1,142 @@
+"""SOSConfig reads through a process-local cache, kept fresh by pushes.
+
+Saving or deleting an SOSConfig evicts it here (see caregivers.signals) and
+publishes the new values to the ``sos_config`` channel-layer group and to
+``sos_config_<user_id>``. boing.asgi runs ``watch()`` in every worker,
+so their caches are updated in place rather than re-read or polled;
+SOS_CONFIG_CACHE_TTL is only the backstop if a notification is lost.
+
+Users without a row get SOSConfig's defaults, unsaved, so detectors can
+check flags for anyone without creating rows.
+"""
+import threading
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .models import SOSConfig
+
+GROUP = "sos_config"
+
+FIELDS = [field.attname for field in SOSConfig._meta.concrete_fields]
+
+
+def user_group(user_id):
+    return f"{GROUP}_{user_id}"
+
+
+def to_values(config):
+    """The JSON-safe form published over the channel layer."""
+    return {name: getattr(config, name) for name in FIELDS}
+
+
+class SOSConfigCache:
+    """user id -> that user's SOSConfig field values, or None for no row.
+
+    Every read builds a fresh instance, so a caller changing one (the PATCH
+    view does) never touches what other requests see.
+
+    ``generation`` counts pushes and evictions. A database read is only
+    cached if none happened while it ran, so a stale read never overwrites
+    a newer pushed value.
+    """
+
+    def __init__(self, ttl=300.0):
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _build(self, user_id, values):
+        if values is None:
+            return SOSConfig(user_id=int(user_id))
+        return SOSConfig.from_db("default", FIELDS, [values[name] for name in FIELDS])
+
+    def get_many(self, user_ids):
+        """``{user_id: SOSConfig}`` for every id, with one query for all the misses."""
+        user_ids = {str(user_id) for user_id in user_ids}
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            generation = self.generation
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is None or entry[0] < now:
+                    missing.append(user_id)
+                else:
+                    found[user_id] = entry[1]
+        if missing:
+            rows = {str(config.user_id): to_values(config) for config in SOSConfig.objects.filter(user_id__in=missing)}
+            with self._lock:
+                changed = self.generation != generation
+                for user_id in missing:
+                    entry = self._entries.get(user_id)
+                    if changed and entry is not None and entry[0] >= now:
+                        found[user_id] = entry[1]  # pushed while we read
+                        continue
+                    found[user_id] = rows.get(user_id)
+                    if not changed:
+                        self._entries[user_id] = (time.monotonic() + self.ttl, found[user_id])
+        return {user_id: self._build(user_id, values) for user_id, values in found.items()}
+
+    def set(self, user_id, values):
+        with self._lock:
+            self.generation += 1
+            self._entries[str(user_id)] = (time.monotonic() + self.ttl, values)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+sos_configs = SOSConfigCache(ttl=settings.SOS_CONFIG_CACHE_TTL)
+
+
+def get_configs(user_ids):
+    return sos_configs.get_many(user_ids)
+
+
+def get_config(user_id):
+    return get_configs([user_id])[str(user_id)]
+
+
+def get_or_create_config(user_id):
+    """The user's saved SOSConfig, creating the row the first time (what the settings screen edits)."""
+    config = get_config(user_id)
+    if config.pk is None:
+        config, _ = SOSConfig.objects.get_or_create(user_id=int(user_id))
+    return config
+
+
+def apply_change(event):
+    """Applies a ``sos_config_changed`` event to this process's cache."""
+    sos_configs.set(event["user_id"], event["config"])
+
+
+async def watch(on_change=None):
+    """Keeps this process's cache current from the channel layer, forever.
+
+    boing.asgi starts it in every worker; other long-running processes
+    can run it as a task at start-up. ``on_change(user_id, config)`` is
+    awaited after each update if given.
+    """
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    await layer.group_add(GROUP, channel)
+    try:
+        while True:
+            event = await layer.receive(channel)
+            if event.get("type") != "sos_config_changed":
+                continue
+            apply_change(event)
+            if on_change is not None:
+                await on_change(event["user_id"], get_config(event["user_id"]))
+    finally:
+        await layer.group_discard(GROUP, channel)
@@ -4,4 +4,6 @@ from .models import SOSConfig
 class SOSConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = SOSConfig
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+        # Set from the URL; a body can't move a config to someone else.
+        read_only_fields = ["user"]
\ No newline at end of file
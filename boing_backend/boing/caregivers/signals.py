@@ -0,0 +1,30 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .config import GROUP, apply_change, sos_configs, to_values, user_group
+from .models import SOSConfig
+
+
+@receiver([post_save, post_delete], sender=SOSConfig)
+def sos_config_changed(sender, instance, **kwargs):
+    """Evicts the config here and, once committed, pushes its new values
+    (None once deleted) to this process's cache and every watcher."""
+    user_id = str(instance.user_id)
+    sos_configs.invalidate(user_id)
+    event = {
+        "type": "sos_config_changed",
+        "user_id": user_id,
+        "config": None if kwargs["signal"] is post_delete else to_values(instance),
+    }
+
+    def notify():
+        # Committed, so this process can cache the new values straight away.
+        apply_change(event)
+        send = async_to_sync(get_channel_layer().group_send)
+        send(GROUP, event)
+        send(user_group(user_id), event)
+
+    transaction.on_commit(notify)
@@ -0,0 +1,117 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from authing.models import User
+from .config import GROUP, get_config, sos_configs, to_values, user_group, watch
+from .models import SOSConfig
+
+
+class SOSConfigViewTestCase(TestCase):
+    def setUp(self):
+        sos_configs.clear()
+        self.addCleanup(sos_configs.clear)
+        self.caregiver = User.objects.create(name="Carer", phone="9000000001", email="c@example.com", role="caregiver")
+        self.gran = User.objects.create(
+            name="Gran", phone="9000000002", email="g@example.com", role="elderly", emergency_contact="9000000001"
+        )
+        self.stranger = User.objects.create(name="Other", phone="9000000003", email="o@example.com", role="caregiver")
+        self.client = APIClient()
+
+    def test_caregiver_reads_and_edits_elderly_config(self):
+        self.client.force_authenticate(self.caregiver)
+        response = self.client.get(f"/caregiver/edit-config/?elderly_id={self.gran.pk}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user"], self.gran.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/caregiver/edit-config/", {"elderly_id": self.gran.pk, "battery_threshold": 30}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SOSConfig.objects.get(user=self.gran).battery_threshold, 30)
+        self.assertFalse(SOSConfig.objects.filter(user=self.caregiver).exists())
+
+        with self.assertNumQueries(1):  # the emergency-contact check only
+            response = self.client.get(f"/caregiver/edit-config/?elderly_id={self.gran.pk}")
+        self.assertEqual(response.data["battery_threshold"], 30)
+
+    def test_other_users_configs_are_forbidden(self):
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.get(f"/caregiver/edit-config/?elderly_id={self.gran.pk}").status_code, 403)
+        response = self.client.patch(
+            "/caregiver/edit-config/", {"elderly_id": self.gran.pk, "battery_threshold": 30}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_missing_configs_read_as_defaults_without_a_row(self):
+        config = get_config(self.gran.pk)
+        self.assertIsNone(config.pk)
+        self.assertTrue(config.phone_fall_sos_enabled)
+        self.assertFalse(SOSConfig.objects.exists())
+
+    def test_changes_evict_and_are_published(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(user_group(self.gran.pk), channel)
+        self.addCleanup(async_to_sync(layer.group_discard), user_group(self.gran.pk), channel)
+
+        self.assertTrue(get_config(self.gran.pk).cctv_fall_sos_enabled)
+        with self.captureOnCommitCallbacks(execute=True):
+            config = SOSConfig.objects.create(user=self.gran, cctv_fall_sos_enabled=False)
+        self.assertFalse(get_config(self.gran.pk).cctv_fall_sos_enabled)
+
+        event = async_to_sync(layer.receive)(channel)
+        self.assertEqual(event["type"], "sos_config_changed")
+        self.assertEqual(event["user_id"], str(self.gran.pk))
+        self.assertFalse(event["config"]["cctv_fall_sos_enabled"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            config.delete()
+        self.assertIsNone(async_to_sync(layer.receive)(channel)["config"])
+        self.assertIsNone(get_config(self.gran.pk).pk)
+
+    def test_reads_do_not_overwrite_values_pushed_meanwhile(self):
+        SOSConfig.objects.create(user=self.gran)
+        sos_configs.clear()
+        pushed = to_values(SOSConfig(id=99, user_id=self.gran.pk, cctv_fall_sos_enabled=False))
+        query = SOSConfig.objects.filter
+
+        def query_then_push(**lookups):
+            rows = list(query(**lookups))
+            sos_configs.set(self.gran.pk, pushed)  # a watch() update landing mid-query
+            return rows
+
+        with mock.patch.object(SOSConfig.objects, "filter", side_effect=query_then_push):
+            self.assertFalse(get_config(self.gran.pk).cctv_fall_sos_enabled)
+        with self.assertNumQueries(0):
+            self.assertFalse(get_config(self.gran.pk).cctv_fall_sos_enabled)
+
+
+class WatchTestCase(SimpleTestCase):
+    async def test_watch_applies_changes_made_elsewhere(self):
+        self.addCleanup(sos_configs.clear)
+        changes = asyncio.Queue()
+
+        async def on_change(user_id, config):
+            await changes.put((user_id, config))
+
+        task = asyncio.create_task(watch(on_change))
+        self.addCleanup(task.cancel)
+        await asyncio.sleep(0.05)  # joins the group
+
+        values = to_values(SOSConfig(id=7, user_id=42, phone_fall_sos_enabled=False))
+        await get_channel_layer().group_send(GROUP, {"type": "sos_config_changed", "user_id": "42", "config": values})
+        user_id, config = await asyncio.wait_for(changes.get(), 1)
+        self.assertEqual((user_id, config.pk, config.phone_fall_sos_enabled), ("42", 7, False))
+
+        # Read from the pushed values: no query (SimpleTestCase would refuse one).
+        self.assertFalse(get_config(42).phone_fall_sos_enabled)
+
+        await get_channel_layer().group_send(GROUP, {"type": "sos_config_changed", "user_id": "42", "config": None})
+        await asyncio.wait_for(changes.get(), 1)
+        self.assertIsNone(get_config(42).pk)
@@ -2,20 +2,36 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from .models import SOSConfig
+from live_track.permissions import can_track
+from .config import get_or_create_config
 from .serializers import SOSConfigSerializer
 
 class SOSConfigView(APIView):
+    """The caller's SOSConfig or, with ``elderly_id`` (query string, or body
+    on PATCH), that of an elderly user who lists the caller as their
+    emergency contact."""
     permission_classes = [IsAuthenticated]
 
+    def target_user_id(self, request):
+        elderly_id = request.query_params.get("elderly_id")
+        if elderly_id is None and request.method == "PATCH":
+            elderly_id = request.data.get("elderly_id")
+        if elderly_id in (None, ""):
+            return request.user.pk
+        return elderly_id if can_track(request.user, elderly_id) else None
+
     def get(self, request):
-        sos_config, _ = SOSConfig.objects.get_or_create(user=request.user)
-        serializer = SOSConfigSerializer(sos_config)
+        user_id = self.target_user_id(request)
+        if user_id is None:
+            return Response({"error": "Not allowed to view this user's settings"}, status=status.HTTP_403_FORBIDDEN)
+        serializer = SOSConfigSerializer(get_or_create_config(user_id))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request):
-        sos_config, _ = SOSConfig.objects.get_or_create(user=request.user)
-        serializer = SOSConfigSerializer(sos_config, data=request.data, partial=True)
+        user_id = self.target_user_id(request)
+        if user_id is None:
+            return Response({"error": "Not allowed to change this user's settings"}, status=status.HTTP_403_FORBIDDEN)
+        serializer = SOSConfigSerializer(get_or_create_config(user_id), data=request.data, partial=True)
         
         if serializer.is_valid():
             serializer.save()
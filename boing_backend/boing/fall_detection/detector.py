@@ -0,0 +1,96 @@
+"""Free-fall -> impact -> stillness fall detector over many windows at once.
+
+The thresholds match the phone's FallDetectionService. Every step is an
+array operation over a ``(windows, samples)`` grid, so a batch from
+thousands of devices costs a few NumPy passes rather than a Python loop per
+sample.
+"""
+import numpy as np
+
+GRAVITY = 9.81
+
+FREE_FALL_THRESHOLD = 2.5    # m/s^2, magnitude below this is free fall
+IMPACT_THRESHOLD = 15.0      # m/s^2, magnitude above this is an impact
+STILLNESS_THRESHOLD = 0.5    # m/s^2, std of magnitude after the impact
+IMPACT_WINDOW = 1.0          # s, an impact must follow free fall within this
+SETTLE_TIME = 0.5            # s, skipped after the impact before checking stillness
+STILL_TIME = 1.0             # s, how long the device must then stay still
+ROTATION_THRESHOLD = 3.0     # rad/s, peak gyro rate near the impact, when gyro data is sent
+
+
+def stack_windows(samples):
+    """Zero-pads a list of ``(n, 3)`` sample lists into a ``(W, T, 3)`` array; returns it and the lengths."""
+    lengths = np.fromiter((len(s) for s in samples), dtype=np.int64, count=len(samples))
+    stacked = np.zeros((len(samples), int(lengths.max(initial=0)), 3), dtype=np.float32)
+    for i, window in enumerate(samples):
+        if len(window):
+            stacked[i, :len(window)] = window
+    return stacked, lengths
+
+
+def _window_sums(values, start, length):
+    """``sum(values[:, t + start : t + start + length])`` for every t; NaN where it runs past the end."""
+    windows, samples = values.shape
+    prefix = np.zeros((windows, samples + 1))
+    np.cumsum(values, axis=1, out=prefix[:, 1:])
+    sums = np.full((windows, samples), np.nan)
+    count = samples - start - length + 1
+    if count > 0:
+        sums[:, :count] = prefix[:, start + length:start + length + count] - prefix[:, start:start + count]
+    return sums
+
+
+def detect_falls(accel, lengths, sample_rate, gyro=None, gyro_lengths=None):
+    """Finds the first confirmed fall in each window.
+
+    ``accel`` is ``(W, T, 3)`` in m/s^2 including gravity, zero-padded past
+    ``lengths``. ``gyro``, if given, is the matching ``(W, T, 3)`` rad/s
+    array; windows whose ``gyro_lengths`` is 0 skip the rotation check.
+    An impact counts when free fall preceded it within IMPACT_WINDOW and the
+    magnitude's std stays under STILLNESS_THRESHOLD for STILL_TIME after a
+    SETTLE_TIME pause, so windows must run at least that long past an impact
+    for it to be confirmed.
+
+    Returns ``(fallen, index, peak)``: a bool per window, the impact's sample
+    index and its magnitude.
+    """
+    windows, samples = accel.shape[:2]
+    if windows == 0 or samples == 0:
+        return np.zeros(windows, bool), np.zeros(windows, np.int64), np.zeros(windows)
+
+    impact_n = max(int(round(IMPACT_WINDOW * sample_rate)), 1)
+    settle_n = int(round(SETTLE_TIME * sample_rate))
+    still_n = max(int(round(STILL_TIME * sample_rate)), 2)
+
+    magnitude = np.sqrt(np.einsum("wtk,wtk->wt", accel, accel, dtype=np.float64))
+    index = np.arange(samples)
+    valid = index < lengths[:, None]
+
+    free = (magnitude < FREE_FALL_THRESHOLD) & valid
+    free_prefix = np.zeros((windows, samples + 1), dtype=np.int32)
+    np.cumsum(free, axis=1, out=free_prefix[:, 1:])
+    recent_free = free_prefix[:, index + 1] - free_prefix[:, np.maximum(index + 1 - impact_n, 0)] > 0
+
+    impact = magnitude > IMPACT_THRESHOLD
+
+    mean = _window_sums(magnitude, settle_n, still_n) / still_n
+    mean_sq = _window_sums(magnitude * magnitude, settle_n, still_n) / still_n
+    with np.errstate(invalid="ignore"):
+        still = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0)) < STILLNESS_THRESHOLD
+    # The stillness window must be real samples, not padding.
+    still &= index <= (lengths - settle_n - still_n)[:, None]
+
+    confirmed = impact & recent_free & still
+
+    if gyro is not None:
+        rotation = np.sqrt(np.einsum("wtk,wtk->wt", gyro, gyro, dtype=np.float64))
+        padded = np.pad(rotation, ((0, 0), (impact_n, impact_n)))
+        peak_rotation = np.lib.stride_tricks.sliding_window_view(padded, 2 * impact_n + 1, axis=1).max(axis=-1)
+        rotated = peak_rotation >= ROTATION_THRESHOLD
+        rotated |= (gyro_lengths == 0)[:, None]
+        confirmed &= rotated
+
+    fallen = confirmed.any(axis=1)
+    first = confirmed.argmax(axis=1)
+    peak = magnitude[np.arange(windows), first]
+    return fallen, first, np.where(fallen, peak, 0.0)
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FallEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('detected_at', models.DateTimeField(db_index=True)),
+                ('source', models.CharField(choices=[('phone', 'Phone'), ('server', 'Server')], max_length=10)),
+                ('peak_acceleration', models.FloatField()),
+                ('location', models.CharField(blank=True, default='', max_length=255)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fall_events', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+class FallEvent(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="fall_events")
+    detected_at = models.DateTimeField(db_index=True)
+    source = models.CharField(max_length=10, choices=[("phone", "Phone"), ("server", "Server")])
+    peak_acceleration = models.FloatField()
+    location = models.CharField(max_length=255, blank=True, default="")
+
+    def __str__(self):
+        return f"Fall for {self.user.email} at {self.detected_at}"
@@ -0,0 +1,142 @@
+import datetime
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from authing.models import User
+from caregivers.config import sos_configs
+from caregivers.models import SOSConfig
+from .detector import GRAVITY, detect_falls, stack_windows
+from .models import FallEvent
+
+RATE = 50
+
+
+def window(free_fall=True, impact=True, after=2.0, noise=0.0, seed=0):
+    """1 s at rest, optional 0.3 s free fall, optional impact, then ``after`` s with ``noise``."""
+    rng = np.random.default_rng(seed)
+    magnitudes = [GRAVITY] * RATE
+    if free_fall:
+        magnitudes += [1.0] * int(0.3 * RATE)
+    if impact:
+        magnitudes += [25.0]
+    magnitudes += list(GRAVITY + rng.normal(0, noise, int(after * RATE)) if noise else [GRAVITY] * int(after * RATE))
+    return [[0.0, 0.0, m] for m in magnitudes]
+
+
+class DetectorTestCase(SimpleTestCase):
+    def test_detects_only_free_fall_impact_then_stillness(self):
+        samples = [
+            window(),
+            window(free_fall=False),
+            window(impact=False),
+            window(noise=3.0),
+            window(after=0.5),  # ends before stillness can be confirmed
+        ]
+        accel, lengths = stack_windows(samples)
+        fallen, index, peak = detect_falls(accel, lengths, RATE)
+        self.assertEqual(fallen.tolist(), [True, False, False, False, False])
+        self.assertEqual(index[0], RATE + int(0.3 * RATE))
+        self.assertAlmostEqual(peak[0], 25.0, places=4)
+
+    def test_gyro_must_show_rotation(self):
+        accel, lengths = stack_windows([window(), window()])
+        gyro = np.zeros_like(accel)
+        gyro[0, RATE + 10, 0] = 5.0
+        gyro_lengths = np.array([accel.shape[1], accel.shape[1]])
+        fallen, _, _ = detect_falls(accel, lengths, RATE, gyro, gyro_lengths)
+        self.assertEqual(fallen.tolist(), [True, False])
+
+
+class FallDetectionViewTestCase(TestCase):
+    def setUp(self):
+        sos_configs.clear()
+        self.addCleanup(sos_configs.clear)
+        self.caregiver = User.objects.create(name="Carer", phone="9000000001", email="c@example.com", role="caregiver")
+        self.gran = User.objects.create(
+            name="Gran", phone="9000000002", email="g@example.com", role="elderly", emergency_contact="9000000001"
+        )
+        self.grandad = User.objects.create(
+            name="Grandad", phone="9000000003", email="gd@example.com", role="elderly", emergency_contact="9000000001"
+        )
+        SOSConfig.objects.create(user=self.grandad, phone_fall_sos_enabled=False)
+        self.client = APIClient()
+
+    def test_batch_records_falls_for_enabled_users(self):
+        self.client.force_authenticate(self.caregiver)
+        windows = [
+            {"user_id": self.gran.pk, "start": 1700000000000, "sample_rate": RATE, "accel": window()},
+            {"user_id": self.grandad.pk, "start": 1700000000000, "sample_rate": RATE, "accel": window()},
+        ]
+        response = self.client.post("/fall-detection/", {"windows": windows}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["windows"], 1)
+        self.assertEqual([fall["user_id"] for fall in response.data["falls"]], [str(self.gran.pk)])
+        self.assertEqual(list(FallEvent.objects.values_list("user_id", "source")), [(self.gran.pk, "server")])
+
+        # Within the cooldown the same fall is not recorded twice.
+        response = self.client.post("/fall-detection/", {"windows": windows}, format="json")
+        self.assertEqual(response.data["falls"], [])
+        self.assertEqual(FallEvent.objects.count(), 1)
+
+    def test_cooldown_is_checked_per_user(self):
+        self.client.force_authenticate(self.caregiver)
+        SOSConfig.objects.filter(user=self.grandad).update(phone_fall_sos_enabled=True)
+        sos_configs.clear()
+        # Gran's stored fall is an hour before her window here, but at the time of Grandad's.
+        FallEvent.objects.create(
+            user=self.gran, detected_at=datetime.datetime(2023, 11, 14, 22, 13, 21, tzinfo=datetime.timezone.utc),
+            source="phone", peak_acceleration=20.0,
+        )
+        windows = [
+            {"user_id": self.gran.pk, "start": 1700003600000, "sample_rate": RATE, "accel": window()},
+            {"user_id": self.grandad.pk, "start": 1700000000000, "sample_rate": RATE, "accel": window()},
+        ]
+        response = self.client.post("/fall-detection/", {"windows": windows}, format="json")
+        recorded = [fall["user_id"] for fall in response.data["falls"]]
+        self.assertEqual(recorded, [str(self.gran.pk), str(self.grandad.pk)])
+        self.assertEqual(FallEvent.objects.filter(source="server").count(), 2)
+
+    def test_batch_rejects_malformed_windows(self):
+        self.client.force_authenticate(self.caregiver)
+        good = {"user_id": self.gran.pk, "start": 1700000000000, "sample_rate": RATE, "accel": window()}
+        for change, message in (
+            ({"sample_rate": "inf"}, "sample_rate must be a positive"),
+            ({"sample_rate": "nan"}, "sample_rate must be a positive"),
+            ({"sample_rate": 0}, "sample_rate must be a positive"),
+            ({"sample_rate": -50}, "sample_rate must be a positive"),
+            ({"sample_rate": "fast"}, "sample_rate must be a number"),
+            ({"start": 10 ** 20}, "start is out of range"),
+            ({"start": "soon"}, "start must be an integer"),
+            ({"accel": 5}, "accel and gyro must be lists"),
+            ({"gyro": 5}, "accel and gyro must be lists"),
+            ({"accel": [5, 6]}, "Samples must be [x, y, z] numbers"),
+        ):
+            response = self.client.post("/fall-detection/", {"windows": [{**good, **change}]}, format="json")
+            self.assertEqual(response.status_code, 400, change)
+            self.assertIn(message, response.data["error"], change)
+        self.assertFalse(FallEvent.objects.exists())
+
+    def test_batch_rejects_untracked_users(self):
+        self.client.force_authenticate(self.gran)
+        windows = [{"user_id": self.grandad.pk, "start": 0, "accel": window()}]
+        response = self.client.post("/fall-detection/", {"windows": windows}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_phone_report_respects_sos_config(self):
+        report = {"timestamp": "2024-01-01T10:00:00Z", "acceleration": 21.5, "location": "Unknown"}
+        self.client.force_authenticate(self.gran)
+        self.assertEqual(self.client.post("/fall-detection/", report, format="json").status_code, 201)
+        self.client.force_authenticate(self.grandad)
+        response = self.client.post("/fall-detection/", report, format="json")
+        self.assertFalse(response.data["recorded"])
+        self.assertEqual(list(FallEvent.objects.values_list("user_id", flat=True)), [self.gran.pk])
+
+    def test_phone_report_times_without_an_offset_are_utc(self):
+        self.client.force_authenticate(self.gran)
+        report = {"timestamp": "2024-01-01T10:00:00", "acceleration": 21.5}
+        self.assertEqual(self.client.post("/fall-detection/", report, format="json").status_code, 201)
+        self.assertEqual(
+            FallEvent.objects.get().detected_at, datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        )
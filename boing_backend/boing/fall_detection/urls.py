@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import FallDetectionView
+
+urlpatterns = [
+    path("", FallDetectionView.as_view(), name="fall-detection"),
+]
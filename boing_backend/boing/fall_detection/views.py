@@ -0,0 +1,177 @@
+import datetime
+import math
+from collections import defaultdict
+
+import numpy as np
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware, now
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from caregivers.config import get_configs
+from live_track.permissions import tracked_user_ids
+from live_track.protocol import MAX_TIMESTAMP_MS
+from .detector import detect_falls, stack_windows
+from .models import FallEvent
+
+FALL_COOLDOWN = datetime.timedelta(seconds=10)
+
+
+def phone_sos_disabled(user_ids):
+    """Ids among ``user_ids`` whose SOSConfig turns phone fall SOS off. No config means on."""
+    return {user_id for user_id, config in get_configs(user_ids).items() if not config.phone_fall_sos_enabled}
+
+
+def from_millis(timestamp_ms):
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=datetime.timezone.utc)
+
+
+def parse_window(window):
+    """Checks one batch window and returns it normalized; raises ValueError saying what is wrong."""
+    if not isinstance(window, dict):
+        raise ValueError("each window must be an object")
+    for key in ("user_id", "start", "accel"):
+        if key not in window:
+            raise ValueError(f"{key} is required")
+    try:
+        start = int(window["start"])
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("start must be an integer, ms since the epoch")
+    if not 0 <= start <= MAX_TIMESTAMP_MS:
+        raise ValueError(f"start is out of range: {start}")
+    try:
+        sample_rate = float(window.get("sample_rate", 50))
+    except (TypeError, ValueError):
+        raise ValueError("sample_rate must be a number")
+    if not math.isfinite(sample_rate) or sample_rate <= 0:
+        raise ValueError(f"sample_rate must be a positive number of Hz, not {sample_rate}")
+    gyro = window.get("gyro") or []
+    if not isinstance(window["accel"], list) or not isinstance(gyro, list):
+        raise ValueError("accel and gyro must be lists of [x, y, z] samples")
+    return {
+        "user_id": str(window["user_id"]),
+        "start": start,
+        "sample_rate": sample_rate,
+        "accel": window["accel"],
+        "gyro": gyro,
+    }
+
+
+class FallDetectionView(APIView):
+    """Records falls, either confirmed on the phone or detected here.
+
+    A phone report is ``{"timestamp", "acceleration", "location"}`` for the
+    calling user. A batch is ``{"windows": [{"user_id", "start" (ms),
+    "sample_rate", "accel": [[x, y, z], ...], "gyro": [...]?}, ...]}`` from
+    any number of devices the caller may track; all windows are run through
+    the vectorized detector together, and the falls recorded are returned.
+    A fall within FALL_COOLDOWN of one already stored for that user is not
+    recorded again. Users whose SOSConfig has phone_fall_sos_enabled off are
+    skipped either way.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if "windows" in request.data:
+            return self.ingest(request, request.data["windows"])
+        return self.report(request)
+
+    def report(self, request):
+        if phone_sos_disabled([request.user.pk]):
+            return Response({"recorded": False, "reason": "Phone fall SOS is disabled"}, status=status.HTTP_200_OK)
+
+        try:
+            detected_at = parse_datetime(str(request.data.get("timestamp", ""))) or now()
+        except ValueError:  # well formed but not a real date
+            detected_at = now()
+        if is_naive(detected_at):
+            detected_at = make_aware(detected_at, datetime.timezone.utc)
+        try:
+            acceleration = float(request.data.get("acceleration", 0.0))
+        except (TypeError, ValueError):
+            return Response({"error": "acceleration must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        FallEvent.objects.create(
+            user=request.user,
+            detected_at=detected_at,
+            source="phone",
+            peak_acceleration=acceleration,
+            location=str(request.data.get("location", ""))[:255],
+        )
+        return Response({"recorded": True}, status=status.HTTP_201_CREATED)
+
+    def ingest(self, request, windows):
+        if not isinstance(windows, list):
+            return Response({"error": "windows must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            windows = [parse_window(window) for window in windows]
+        except ValueError as e:
+            return Response({"error": f"Invalid window: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_ids = {window["user_id"] for window in windows}
+        denied = user_ids - tracked_user_ids(request.user)
+        if denied:
+            return Response({"error": f"Not allowed to report for {sorted(denied)}"}, status=status.HTTP_403_FORBIDDEN)
+        disabled = phone_sos_disabled(user_ids)
+        windows = [window for window in windows if window["user_id"] not in disabled]
+
+        by_rate = defaultdict(list)
+        for window in windows:
+            by_rate[window["sample_rate"]].append(window)
+
+        detected = {}
+        try:
+            for sample_rate, group in by_rate.items():
+                accel, lengths = stack_windows([window["accel"] for window in group])
+                gyro, gyro_lengths = stack_windows([window["gyro"] for window in group])
+                if gyro.shape[1] == 0:
+                    gyro = gyro_lengths = None
+                elif gyro.shape[1] < accel.shape[1]:
+                    gyro = np.pad(gyro, ((0, 0), (0, accel.shape[1] - gyro.shape[1]), (0, 0)))
+                else:
+                    gyro = gyro[:, :accel.shape[1]]
+                fallen, index, peak = detect_falls(accel, lengths, sample_rate, gyro, gyro_lengths)
+                for i in np.flatnonzero(fallen):
+                    window = group[i]
+                    try:
+                        at = from_millis(window["start"] + 1000 * int(index[i]) / sample_rate)
+                    except (OverflowError, OSError):
+                        return Response(
+                            {"error": "Invalid window: the fall's time is out of range"},
+                            status=status.HTTP_400_BAD_REQUEST,
+                        )
+                    # One event per user per batch: the earliest.
+                    if window["user_id"] not in detected or at < detected[window["user_id"]][0]:
+                        detected[window["user_id"]] = (at, float(peak[i]))
+        except (TypeError, ValueError) as e:
+            return Response({"error": f"Samples must be [x, y, z] numbers: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if detected:
+            # One query for everyone; each user is then checked against their own time.
+            times = [at for at, _ in detected.values()]
+            nearby = defaultdict(list)
+            for user_id, detected_at in FallEvent.objects.filter(
+                user_id__in=detected.keys(),
+                detected_at__gte=min(times) - FALL_COOLDOWN,
+                detected_at__lte=max(times) + FALL_COOLDOWN,
+            ).values_list("user_id", "detected_at"):
+                nearby[str(user_id)].append(detected_at)
+            detected = {
+                user_id: (at, peak) for user_id, (at, peak) in detected.items()
+                if not any(abs(other - at) <= FALL_COOLDOWN for other in nearby[user_id])
+            }
+            FallEvent.objects.bulk_create([
+                FallEvent(user_id=int(user_id), detected_at=at, source="server", peak_acceleration=peak)
+                for user_id, (at, peak) in detected.items()
+            ])
+
+        return Response({
+            "windows": len(windows),
+            "samples": sum(len(window["accel"]) for window in windows),
+            "falls": [
+                {"user_id": user_id, "detected_at": at.isoformat(), "peak_acceleration": peak}
+                for user_id, (at, peak) in sorted(detected.items())
+            ],
+        }, status=status.HTTP_200_OK)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class LiveTrackConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "live_track"
+
+    def ready(self):
+        import mongoengine
+        from django.conf import settings
+
+        # pymongo connects lazily, so this costs nothing until the first write.
+        mongoengine.connect(host=settings.MONGODB_URI)
+
+        from . import signals  # noqa: F401
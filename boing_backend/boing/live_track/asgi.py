@@ -1,14 +1,16 @@
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-import live_track.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boing.settings")
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from live_track.middleware import JWTAuthMiddleware  # noqa: E402
+import live_track.routing  # noqa: E402
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
+    "http": django_asgi_app,
+    "websocket": JWTAuthMiddleware(
         URLRouter(live_track.routing.websocket_urlpatterns)
     ),
-})
\ No newline at end of file
+})
@@ -0,0 +1,81 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from pymongo import UpdateOne
+
+from .models import LocationBucket
+
+UTC = datetime.timezone.utc
+
+
+def to_millis(timestamp):
+    """Milliseconds since the epoch. Naive datetimes (as pymongo returns them) are taken as UTC."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return int(timestamp.timestamp() * 1000)
+
+
+def from_millis(timestamp_ms):
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=UTC)
+
+
+def bucket_start(timestamp_ms, bucket_seconds=None):
+    size = (bucket_seconds or settings.LOCATION_BUCKET_SECONDS) * 1000
+    return timestamp_ms - timestamp_ms % size
+
+
+def bucket_updates(points, bucket_seconds=None):
+    """Groups ``(user_id, latitude, longitude, timestamp)`` points into one upsert per bucket."""
+    groups = defaultdict(list)
+    for user_id, latitude, longitude, timestamp in points:
+        timestamp_ms = to_millis(timestamp)
+        groups[user_id, bucket_start(timestamp_ms, bucket_seconds)].append((timestamp_ms, latitude, longitude))
+
+    updates = []
+    for (user_id, start), rows in groups.items():
+        rows.sort()
+        timestamps, latitudes, longitudes = zip(*rows)
+        updates.append(UpdateOne(
+            {"user_id": user_id, "start": from_millis(start)},
+            {
+                "$push": {
+                    "timestamps": {"$each": list(timestamps)},
+                    "latitudes": {"$each": list(latitudes)},
+                    "longitudes": {"$each": list(longitudes)},
+                },
+                "$inc": {"count": len(rows)},
+                "$max": {"end": from_millis(timestamps[-1])},
+            },
+            upsert=True,
+        ))
+    return updates
+
+
+def append_points(points):
+    """Appends points to their buckets in one bulk round trip."""
+    updates = bucket_updates(points)
+    if updates:
+        LocationBucket._get_collection().bulk_write(updates, ordered=False)
+
+
+def points_between(user_id, start, end):
+    """Yields ``(timestamp_ms, latitude, longitude)`` for ``start <= t < end``, oldest first.
+
+    Only the buckets overlapping the range are read, through the
+    (user_id, start) index.
+    """
+    start_ms, end_ms = to_millis(start), to_millis(end)
+    buckets = LocationBucket._get_collection().find(
+        {
+            "user_id": user_id,
+            "start": {"$gte": from_millis(bucket_start(start_ms)), "$lt": from_millis(end_ms)},
+        },
+        {"timestamps": 1, "latitudes": 1, "longitudes": 1, "_id": 0},
+        sort=[("start", 1)],
+    )
+    for bucket in buckets:
+        rows = sorted(zip(bucket["timestamps"], bucket["latitudes"], bucket["longitudes"]))
+        for row in rows:
+            if start_ms <= row[0] < end_ms:
+                yield row
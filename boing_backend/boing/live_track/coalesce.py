@@ -0,0 +1,90 @@
+import asyncio
+import math
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class LocationCoalescer:
+    """Thins one user's location stream before it is broadcast and stored.
+
+    A point closer than ``min_distance`` metres to the last published point
+    is dropped. A point timestamped within ``min_interval`` seconds of the
+    last published one is held; newer points replace it, and the held point
+    is published when the window closes. Intervals are measured on the
+    points' own timestamps, so a batch of buffered points is thinned to one
+    per interval of the time they were recorded, not collapsed because they
+    arrived together. ``publish(latitude, longitude, timestamp, accuracy)``
+    is the coroutine that broadcasts and stores a point; timestamps are
+    datetimes.
+    """
+
+    def __init__(self, publish, min_interval=1.0, min_distance=5.0):
+        self.publish = publish
+        self.min_interval = min_interval
+        self.min_distance = min_distance
+        self.dropped = 0
+        self.merged = 0
+        self._last = None
+        self._last_timestamp = None
+        self._last_at = None
+        self._pending = None
+        self._timer = None
+        self._loop = asyncio.get_running_loop()
+
+    def _too_close(self, latitude, longitude):
+        if self._last is None or self.min_distance <= 0:
+            return False
+        return haversine(*self._last, latitude, longitude) < self.min_distance
+
+    async def offer(self, latitude, longitude, timestamp, accuracy=0.0):
+        if self._too_close(latitude, longitude):
+            self.dropped += 1
+            return
+
+        if self._pending is not None:
+            self.merged += 1
+        if self._last_timestamp is None or (timestamp - self._last_timestamp).total_seconds() >= self.min_interval:
+            # A newer point supersedes anything still held.
+            self._cancel_timer()
+            self._pending = None
+            await self._publish(latitude, longitude, timestamp, accuracy)
+            return
+
+        self._pending = (latitude, longitude, timestamp, accuracy)
+        if self._timer is None:
+            delay = max(0.0, self.min_interval - (self._loop.time() - self._last_at))
+            self._timer = self._loop.call_later(delay, self._flush_pending)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_pending(self):
+        self._timer = None
+        pending, self._pending = self._pending, None
+        if pending is not None and not self._too_close(*pending[:2]):
+            self._loop.create_task(self._publish(*pending))
+
+    async def _publish(self, latitude, longitude, timestamp, accuracy):
+        self._last = (latitude, longitude)
+        self._last_timestamp = timestamp
+        self._last_at = self._loop.time()
+        await self.publish(latitude, longitude, timestamp, accuracy)
+
+    async def close(self):
+        """Publishes the held point now rather than dropping it: on disconnect
+        it is the user's last known position."""
+        self._cancel_timer()
+        pending, self._pending = self._pending, None
+        if pending is not None and not self._too_close(*pending[:2]):
+            await self._publish(*pending)
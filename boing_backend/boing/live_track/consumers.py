@@ -1,39 +1,303 @@
+import asyncio
 import json
+import logging
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from .models import UserLocation
+from django.conf import settings
+from . import presence, protocol
+from .coalesce import LocationCoalescer
+from .geofence import compile_fence, geofence_index
+from .models import Geofence
+from .writer import get_location_writer
 from django.utils.timezone import now
 
+logger = logging.getLogger(__name__)
+
+
+@database_sync_to_async
+def load_fences(user_id):
+    if not user_id.isdigit():
+        return []
+    fences = []
+    for geofence in Geofence.objects.filter(user_id=user_id):
+        try:
+            fences.append(compile_fence(geofence))
+        except ValueError as e:
+            # One bad row must not close the user's socket on every ping.
+            logger.warning("Skipping geofence %s: %s", geofence.pk, e)
+    return fences
+
+
 class LiveLocationConsumer(AsyncWebsocketConsumer):
+    coalescer = None
+
     async def connect(self):
         self.user_id = self.scope["url_route"]["kwargs"]["user_id"]
+        # Set by JWTAuthMiddleware at connect; nothing is re-checked per message.
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated or self.user_id not in self.scope["tracked_user_ids"]:
+            await self.close(code=4403)
+            return
+        # Caregivers may watch a user's group but only the user publishes to it.
+        self.can_publish = str(user.pk) == self.user_id
+
         self.room_group_name = f"location_{self.user_id}"
+        self.geofence_group_name = f"geofence_{self.user_id}"
+        subprotocols = self.scope.get("subprotocols", [])
+        self.binary = protocol.BINARY_SUBPROTOCOL in subprotocols
+        self.coalescer = LocationCoalescer(
+            self.publish_location,
+            min_interval=settings.LOCATION_MIN_INTERVAL_MS / 1000,
+            min_distance=settings.LOCATION_MIN_DISTANCE_M,
+        )
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
+        await self.channel_layer.group_add(self.geofence_group_name, self.channel_name)
+        if self.binary:
+            await self.accept(subprotocol=protocol.BINARY_SUBPROTOCOL)
+        elif protocol.JSON_SUBPROTOCOL in subprotocols:
+            await self.accept(subprotocol=protocol.JSON_SUBPROTOCOL)
+        else:
+            await self.accept()
+
+        if self.can_publish:
+            await presence.connected(self.user_id)
+            self.presence_touched_at = asyncio.get_running_loop().time()
 
     async def disconnect(self, close_code):
+        if self.coalescer is None:
+            return
+        await self.coalescer.close()
+        if self.can_publish:
+            await presence.disconnected(self.user_id)
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        await self.channel_layer.group_discard(self.geofence_group_name, self.channel_name)
 
-    async def receive(self, text_data):
-        data = json.loads(text_data)
-        latitude = data["lat"]
-        longitude = data["lon"]
+    async def receive(self, text_data=None, bytes_data=None):
+        if not self.can_publish:
+            return
 
-        UserLocation.objects.create(
-            user_id=self.user_id, latitude=latitude, longitude=longitude, timestamp=now()
-        )
+        # Pings the coalescer drops still keep the user online.
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self.presence_touched_at > settings.LOCATION_PRESENCE_TIMEOUT / 3:
+            self.presence_touched_at = loop_time
+            await presence.still_connected(self.user_id)
+
+        try:
+            if bytes_data is not None:
+                points = protocol.decode_points(bytes_data)
+            else:
+                points = [protocol.decode_json(text_data)]
+            protocol.check_recent(
+                points,
+                protocol.to_millis(now()),
+                settings.LOCATION_MAX_AGE_S * 1000,
+                settings.LOCATION_MAX_CLOCK_SKEW_S * 1000,
+            )
+        except ValueError as e:
+            # Never broadcast: other people's sockets encode what we pass on.
+            await self.send(text_data=json.dumps({"type": "error", "error": str(e)}))
+            return
+
+        if bytes_data is not None:
+            for latitude, longitude, timestamp_ms, accuracy in points:
+                await self.coalescer.offer(latitude, longitude, protocol.to_datetime(timestamp_ms), accuracy)
+            return
+
+        latitude, longitude, timestamp_ms, accuracy = points[0]
+        timestamp = protocol.to_datetime(timestamp_ms) if timestamp_ms is not None else now()
+        await self.coalescer.offer(latitude, longitude, timestamp, accuracy)
+
+    async def publish_location(self, latitude, longitude, timestamp, accuracy=0.0):
+        if settings.LOCATION_STORE_TRAIL:
+            await get_location_writer().put(self.user_id, latitude, longitude, timestamp)
 
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 "type": "send_location",
+                "user_id": self.user_id,
                 "latitude": latitude,
                 "longitude": longitude,
+                "timestamp": protocol.to_millis(timestamp),
+                "accuracy": accuracy,
             },
         )
+        # After the broadcast: cache backends' async methods hop to a thread.
+        await presence.update_location(self.user_id, latitude, longitude, protocol.to_millis(timestamp), accuracy)
+        await self.check_geofences(latitude, longitude)
+
+    async def check_geofences(self, latitude, longitude):
+        if not geofence_index.is_loaded(self.user_id):
+            geofence_index.load(self.user_id, await load_fences(self.user_id))
+
+        for fence, transition in geofence_index.evaluate(self.user_id, latitude, longitude):
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    "type": "send_geofence",
+                    "user_id": self.user_id,
+                    "fence_id": fence.id,
+                    "name": fence.name,
+                    "transition": transition,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                },
+            )
+
+    async def geofence_changed(self, event):
+        geofence_index.invalidate(self.user_id)
+
+    async def send_geofence(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "geofence",
+            "user_id": event["user_id"],
+            "fence_id": event["fence_id"],
+            "name": event["name"],
+            "transition": event["transition"],
+            "latitude": event["latitude"],
+            "longitude": event["longitude"],
+        }))
 
     async def send_location(self, event):
+        if self.binary:
+            await self.send(bytes_data=protocol.encode_point(
+                event["latitude"],
+                event["longitude"],
+                event.get("timestamp", 0),
+                event.get("accuracy", 0.0),
+            ))
+            return
+
+        await self.send(text_data=protocol.encode_json(event["latitude"], event["longitude"]))
+
+
+class CaregiverLocationConsumer(AsyncWebsocketConsumer):
+    """One socket for every elderly user a caregiver tracks.
+
+    Subscribes to all of them at connect. The client can narrow or widen that
+    with ``{"action": "subscribe" | "unsubscribe", "user_ids": [...]}``,
+    limited to the ids JWTAuthMiddleware authorized. Every subscribe is
+    answered with a ``snapshot`` of those users' presence and last known
+    position. Location updates are
+    held (latest per user) and sent as one ``{"type": "locations",
+    "updates": [...]}`` frame at most LOCATION_FANIN_FPS times a second;
+    geofence events go out immediately.
+    """
+    flush_handle = None
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4403)
+            return
+
+        self.allowed = self.scope["tracked_user_ids"] - {str(user.pk)}
+        self.subscribed = set()
+        self.pending = {}
+        self.interval = 1 / settings.LOCATION_FANIN_FPS
+        subprotocols = self.scope.get("subprotocols", [])
+        self.binary = protocol.BINARY_SUBPROTOCOL in subprotocols
+
+        if self.binary:
+            await self.accept(subprotocol=protocol.BINARY_SUBPROTOCOL)
+        elif protocol.JSON_SUBPROTOCOL in subprotocols:
+            await self.accept(subprotocol=protocol.JSON_SUBPROTOCOL)
+        else:
+            await self.accept()
+        await self.subscribe(self.allowed)
+
+    async def disconnect(self, close_code):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+        for user_id in getattr(self, "subscribed", ()):
+            await self.channel_layer.group_discard(f"location_{user_id}", self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "")
+            action, user_ids = data["action"], {str(user_id) for user_id in data["user_ids"]}
+        except (ValueError, KeyError, TypeError):
+            await self.send_error("Expected {\"action\": ..., \"user_ids\": [...]}")
+            return
+
+        if action not in ("subscribe", "unsubscribe"):
+            await self.send_error(f"Unknown action {action!r}")
+            return
+
+        denied = user_ids - self.allowed
+        if denied:
+            await self.send_error(f"Not allowed to track {sorted(denied)}")
+        if action == "subscribe":
+            await self.subscribe(user_ids & self.allowed)
+        else:
+            await self.unsubscribe(user_ids)
+
+    async def subscribe(self, user_ids):
+        """Joins the users' groups, then sends their current presence and position."""
+        added = user_ids - self.subscribed
+        for user_id in added:
+            await self.channel_layer.group_add(f"location_{user_id}", self.channel_name)
+            self.subscribed.add(user_id)
+        if added:
+            snapshot = await presence.asnapshot(added)
+            await self.send(text_data=json.dumps({"type": "snapshot", "users": list(snapshot.values())}))
+
+    async def unsubscribe(self, user_ids):
+        for user_id in user_ids & self.subscribed:
+            await self.channel_layer.group_discard(f"location_{user_id}", self.channel_name)
+            self.subscribed.discard(user_id)
+            self.pending.pop(user_id, None)
+
+    async def send_error(self, message):
+        await self.send(text_data=json.dumps({"type": "error", "error": message}))
+
+    async def send_location(self, event):
+        user_id = event["user_id"]
+        if user_id not in self.subscribed:
+            return
+        self.pending[user_id] = event
+        if self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(self.interval, lambda: loop.create_task(self.flush()))
+
+    async def flush(self):
+        self.flush_handle = None
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return
+
+        if self.binary:
+            await self.send(bytes_data=b"".join(
+                protocol.encode_user_point(
+                    user_id, event["latitude"], event["longitude"], event["timestamp"], event["accuracy"]
+                )
+                for user_id, event in pending.items()
+            ))
+            return
+
+        await self.send(text_data=json.dumps({
+            "type": "locations",
+            "updates": [
+                {
+                    "user_id": user_id,
+                    "latitude": event["latitude"],
+                    "longitude": event["longitude"],
+                    "timestamp": event["timestamp"],
+                }
+                for user_id, event in pending.items()
+            ],
+        }))
+
+    async def send_geofence(self, event):
+        if event["user_id"] not in self.subscribed:
+            return
         await self.send(text_data=json.dumps({
+            "type": "geofence",
+            "user_id": event["user_id"],
+            "fence_id": event["fence_id"],
+            "name": event["name"],
+            "transition": event["transition"],
             "latitude": event["latitude"],
             "longitude": event["longitude"],
         }))
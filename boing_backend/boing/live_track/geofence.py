@@ -0,0 +1,157 @@
+import math
+from collections import defaultdict
+
+from .coalesce import EARTH_RADIUS_M, haversine
+
+METRES_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+
+
+class CircleFence:
+    __slots__ = ("id", "name", "latitude", "longitude", "radius", "bbox")
+
+    def __init__(self, id, name, latitude, longitude, radius):
+        self.id = id
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius = radius
+        dlat = radius / METRES_PER_DEGREE
+        dlon = dlat / max(math.cos(math.radians(latitude)), 1e-6)
+        self.bbox = (latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon)
+
+    def contains(self, latitude, longitude):
+        return haversine(self.latitude, self.longitude, latitude, longitude) <= self.radius
+
+
+class PolygonFence:
+    __slots__ = ("id", "name", "vertices", "bbox")
+
+    def __init__(self, id, name, vertices):
+        self.id = id
+        self.name = name
+        self.vertices = [(float(lat), float(lon)) for lat, lon in vertices]
+        lats = [v[0] for v in self.vertices]
+        lons = [v[1] for v in self.vertices]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))
+
+    def contains(self, latitude, longitude):
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon):
+            return False
+        # Ray casting along the latitude line.
+        inside = False
+        vertices = self.vertices
+        lat_j, lon_j = vertices[-1]
+        for lat_i, lon_i in vertices:
+            if (lat_i > latitude) != (lat_j > latitude):
+                if longitude < lon_i + (latitude - lat_i) * (lon_j - lon_i) / (lat_j - lat_i):
+                    inside = not inside
+            lat_j, lon_j = lat_i, lon_i
+        return inside
+
+
+def _coordinate(latitude, longitude):
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError(f"Not a coordinate: {latitude!r}, {longitude!r}")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"Coordinate out of range: {latitude}, {longitude}")
+    return latitude, longitude
+
+
+def compile_fence(geofence):
+    """Turns a Geofence row into the object the index evaluates.
+
+    Raises ValueError when the row doesn't describe a usable shape.
+    """
+    if geofence.shape == "polygon":
+        vertices = geofence.vertices
+        if not isinstance(vertices, list) or len(vertices) < 3:
+            raise ValueError("A polygon needs a list of at least 3 [lat, lon] vertices")
+        if not all(isinstance(vertex, (list, tuple)) and len(vertex) == 2 for vertex in vertices):
+            raise ValueError("Polygon vertices must be [lat, lon] pairs")
+        return PolygonFence(geofence.pk, geofence.name, [_coordinate(*vertex) for vertex in vertices])
+    if geofence.shape != "circle":
+        raise ValueError(f"Unknown shape {geofence.shape!r}")
+    latitude, longitude = _coordinate(geofence.latitude, geofence.longitude)
+    if geofence.radius is None or not float(geofence.radius) > 0:
+        raise ValueError("A circle needs a positive radius")
+    return CircleFence(geofence.pk, geofence.name, latitude, longitude, float(geofence.radius))
+
+
+class GeofenceIndex:
+    """Per-user fences on a lat/lon grid, with each user's inside/outside state.
+
+    A fence is registered in every ``cell_size``-degree cell its bounding
+    box overlaps, so evaluating a point only tests the fences in one cell.
+    Fences spanning more than ``max_cells`` cells are tested on every point
+    instead. ``evaluate`` returns only transitions; the first point seen
+    for a user sets the state without firing.
+    """
+
+    def __init__(self, cell_size=0.01, max_cells=256):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells = {}
+        self._large = {}
+        self._fences = {}
+        self._inside = {}
+
+    def _cell(self, latitude, longitude):
+        return int(latitude // self.cell_size), int(longitude // self.cell_size)
+
+    def is_loaded(self, user_id):
+        return user_id in self._fences
+
+    def load(self, user_id, fences):
+        """Replaces ``user_id``'s fences. Inside state for fences that still exist is kept."""
+        cells = defaultdict(list)
+        large = []
+        for fence in fences:
+            min_lat, min_lon, max_lat, max_lon = fence.bbox
+            (y0, x0), (y1, x1) = self._cell(min_lat, min_lon), self._cell(max_lat, max_lon)
+            if (y1 - y0 + 1) * (x1 - x0 + 1) > self.max_cells:
+                large.append(fence)
+                continue
+            for y in range(y0, y1 + 1):
+                for x in range(x0, x1 + 1):
+                    cells[y, x].append(fence)
+
+        self._cells[user_id] = dict(cells)
+        self._large[user_id] = large
+        self._fences[user_id] = {fence.id: fence for fence in fences}
+        if self._inside.get(user_id) is not None:
+            self._inside[user_id] &= self._fences[user_id].keys()
+
+    def invalidate(self, user_id):
+        """Forgets ``user_id``'s fences so the next point reloads them."""
+        self._cells.pop(user_id, None)
+        self._large.pop(user_id, None)
+        self._fences.pop(user_id, None)
+
+    def evaluate(self, user_id, latitude, longitude):
+        """Returns ``[(fence, "enter" | "exit"), ...]`` caused by this point."""
+        fences = self._fences.get(user_id)
+        if not fences:
+            return []
+
+        now_inside = set()
+        for fence in self._cells[user_id].get(self._cell(latitude, longitude), ()):
+            if fence.contains(latitude, longitude):
+                now_inside.add(fence.id)
+        for fence in self._large[user_id]:
+            if fence.contains(latitude, longitude):
+                now_inside.add(fence.id)
+
+        was_inside = self._inside.get(user_id)
+        self._inside[user_id] = now_inside
+        if was_inside is None or was_inside == now_inside:
+            return []
+        return (
+            [(fences[i], "enter") for i in now_inside - was_inside]
+            + [(fences[i], "exit") for i in was_inside - now_inside]
+        )
+
+
+geofence_index = GeofenceIndex()
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from live_track.buckets import append_points
+from live_track.models import UserLocation
+
+
+class Command(BaseCommand):
+    help = "Copies per-point UserLocation documents into LocationBuckets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete each batch of UserLocation documents once it is bucketed. "
+                 "This makes the migration resumable; without it, running twice duplicates points.",
+        )
+
+    def handle(self, *args, batch_size, delete, **options):
+        collection = UserLocation._get_collection()
+        cursor = collection.find(
+            {}, {"user_id": 1, "latitude": 1, "longitude": 1, "timestamp": 1}, sort=[("user_id", 1), ("timestamp", 1)]
+        ).batch_size(batch_size)
+
+        migrated = 0
+        start = time.perf_counter()
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                migrated += self._migrate(collection, batch, delete)
+                batch = []
+        if batch:
+            migrated += self._migrate(collection, batch, delete)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Migrated {migrated} points in {elapsed:.1f}s ({migrated / max(elapsed, 1e-9):.0f} points/s)"
+        ))
+
+    def _migrate(self, collection, batch, delete):
+        append_points([(doc["user_id"], doc["latitude"], doc["longitude"], doc["timestamp"]) for doc in batch])
+        if delete:
+            collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        return len(batch)
@@ -0,0 +1,62 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authing.models import User
+
+from .permissions import tracked_user_ids
+
+SUBPROTOCOL_PREFIX = "bearer."
+
+
+def token_from_scope(scope):
+    """The access token from ``?token=``, an ``Authorization: Bearer`` header,
+    or a ``bearer.<token>`` subprotocol (for browsers, which can't set headers)."""
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if query.get("token"):
+        return query["token"][0]
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode().partition(" ")
+            if scheme in api_settings.AUTH_HEADER_TYPES and token:
+                return token
+    for subprotocol in scope.get("subprotocols", []):
+        if subprotocol.startswith(SUBPROTOCOL_PREFIX):
+            return subprotocol[len(SUBPROTOCOL_PREFIX):]
+    return None
+
+
+@database_sync_to_async
+def authenticate(raw_token):
+    """Returns ``(user, tracked_user_ids)``, or an anonymous user and no ids."""
+    try:
+        token = AccessToken(raw_token)
+        user = User.objects.get(**{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]})
+    except (TokenError, KeyError, User.DoesNotExist):
+        return AnonymousUser(), frozenset()
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        return AnonymousUser(), frozenset()
+    return user, frozenset(tracked_user_ids(user))
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Authenticates a websocket once, at connect, from a SimpleJWT access token.
+
+    Sets ``scope["user"]`` and ``scope["tracked_user_ids"]``, the ids whose
+    location the user may see, so consumers can authorize every later
+    message without touching the database or verifying the token again.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        token = token_from_scope(scope)
+        if token:
+            scope["user"], scope["tracked_user_ids"] = await authenticate(token)
+        else:
+            scope["user"], scope["tracked_user_ids"] = AnonymousUser(), frozenset()
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_track', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='geofence',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('shape', 'circle'), _negated=True), models.Q(('latitude__gte', -90), ('latitude__isnull', False), ('latitude__lte', 90), ('longitude__gte', -180), ('longitude__isnull', False), ('longitude__lte', 180), ('radius__gt', 0), ('radius__isnull', False)), _connector='OR'), name='geofence_circle_complete'),
+        ),
+        migrations.AddConstraint(
+            model_name='geofence',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('shape', 'polygon'), _negated=True), ('vertices__isnull', False), _connector='OR'), name='geofence_polygon_has_vertices'),
+        ),
+    ]
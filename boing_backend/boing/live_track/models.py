@@ -1,7 +1,78 @@
-from mongoengine import Document, StringField, FloatField, DateTimeField
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import models
+from mongoengine import Document, StringField, FloatField, DateTimeField, IntField, ListField, LongField
+
+from .geofence import compile_fence
+
+User = get_user_model()
 
 class UserLocation(Document):
+    """One document per ping. Superseded by LocationBucket; kept until migrate_location_buckets has run."""
     user_id = StringField(required=True)
     latitude = FloatField(required=True)
     longitude = FloatField(required=True)
-    timestamp = DateTimeField(required=True)
\ No newline at end of file
+    timestamp = DateTimeField(required=True)
+
+    meta = {"indexes": [("user_id", "timestamp")]}
+
+
+class LocationBucket(Document):
+    """Up to LOCATION_BUCKET_SECONDS of one user's trail as parallel arrays.
+
+    ``timestamps`` are ms since the epoch. ``start`` is the bucket boundary
+    and ``end`` the newest point, which drives the retention TTL.
+    """
+    user_id = StringField(required=True)
+    start = DateTimeField(required=True)
+    end = DateTimeField(required=True)
+    count = IntField(default=0)
+    timestamps = ListField(LongField())
+    latitudes = ListField(FloatField())
+    longitudes = ListField(FloatField())
+
+    meta = {
+        "indexes": [
+            {"fields": ("user_id", "start"), "unique": True},
+            {"fields": ["end"], "expireAfterSeconds": settings.LOCATION_RETENTION_DAYS * 86400},
+        ]
+    }
+
+
+class Geofence(models.Model):
+    """A safe zone around a tracked user: a circle or a polygon of ``[lat, lon]`` vertices."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="geofences")
+    name = models.CharField(max_length=100)
+    shape = models.CharField(max_length=10, choices=[("circle", "Circle"), ("polygon", "Polygon")], default="circle")
+
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    radius = models.FloatField(null=True, blank=True, help_text="Metres")
+
+    vertices = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                name="geofence_circle_complete",
+                # isnull checks too: a comparison with NULL doesn't fail a CHECK.
+                condition=~models.Q(shape="circle") | models.Q(
+                    latitude__isnull=False, longitude__isnull=False, radius__isnull=False,
+                    latitude__gte=-90, latitude__lte=90, longitude__gte=-180, longitude__lte=180, radius__gt=0,
+                ),
+            ),
+            models.CheckConstraint(
+                name="geofence_polygon_has_vertices",
+                condition=~models.Q(shape="polygon") | models.Q(vertices__isnull=False),
+            ),
+        ]
+
+    def clean(self):
+        try:
+            compile_fence(self)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+    def __str__(self):
+        return f"{self.name} ({self.shape}) for {self.user.email}"
@@ -0,0 +1,16 @@
+from authing.models import User
+
+
+def tracked_user_ids(user):
+    """Ids (as strings) whose location ``user`` may see: their own, and every
+    elderly user who lists ``user``'s phone as their emergency contact."""
+    ids = {str(user.pk)}
+    if user.role == "caregiver":
+        ids.update(
+            str(pk) for pk in User.objects.filter(role="elderly", emergency_contact=user.phone).values_list("pk", flat=True)
+        )
+    return ids
+
+
+def can_track(user, user_id):
+    return str(user_id) in tracked_user_ids(user)
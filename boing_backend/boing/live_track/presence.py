@@ -0,0 +1,88 @@
+"""Who is online and where they were last seen, kept in the default cache.
+
+Each tracked user has two keys: a count of open location sockets and their
+last known position. With REDIS_URL set the cache is Redis, so every worker
+sees the same values and nobody has to query the location history.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _connections_key(user_id):
+    return f"presence:{user_id}:connections"
+
+
+def _location_key(user_id):
+    return f"presence:{user_id}:location"
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+async def connected(user_id):
+    key = _connections_key(user_id)
+    await cache.aadd(key, 0, timeout=settings.LOCATION_PRESENCE_TIMEOUT)
+    await cache.aincr(key)
+    await cache.atouch(key, settings.LOCATION_PRESENCE_TIMEOUT)
+
+
+async def still_connected(user_id):
+    """Refreshes the connection count's timeout; called on pings."""
+    await cache.atouch(_connections_key(user_id), settings.LOCATION_PRESENCE_TIMEOUT)
+
+
+async def disconnected(user_id):
+    key = _connections_key(user_id)
+    try:
+        if await cache.adecr(key) <= 0:
+            await cache.adelete(key)
+    except ValueError:
+        pass  # already expired
+
+    location = await cache.aget(_location_key(user_id))
+    if location is not None:
+        location["last_seen"] = _now_ms()
+        await cache.aset(_location_key(user_id), location, timeout=settings.LOCATION_LAST_KNOWN_TTL)
+
+
+async def update_location(user_id, latitude, longitude, timestamp_ms, accuracy=0.0):
+    await cache.aset(
+        _location_key(user_id),
+        {
+            "latitude": latitude,
+            "longitude": longitude,
+            "timestamp": timestamp_ms,
+            "accuracy": accuracy,
+            "last_seen": _now_ms(),
+        },
+        timeout=settings.LOCATION_LAST_KNOWN_TTL,
+    )
+
+
+def _records(user_ids, values):
+    records = {}
+    for user_id in user_ids:
+        record = {"user_id": user_id, "online": values.get(_connections_key(user_id), 0) > 0}
+        record.update(values.get(_location_key(user_id)) or {})
+        records[user_id] = record
+    return records
+
+
+def _keys(user_ids):
+    return [key for user_id in user_ids for key in (_connections_key(user_id), _location_key(user_id))]
+
+
+def snapshot(user_ids):
+    """``{user_id: {"user_id", "online", "latitude", "longitude", "timestamp", "accuracy", "last_seen"}}``.
+
+    The position fields are missing for users never seen."""
+    user_ids = sorted(user_ids)
+    return _records(user_ids, cache.get_many(_keys(user_ids)))
+
+
+async def asnapshot(user_ids):
+    user_ids = sorted(user_ids)
+    return _records(user_ids, await cache.aget_many(_keys(user_ids)))
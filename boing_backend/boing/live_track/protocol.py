@@ -0,0 +1,128 @@
+"""Wire formats for the live location socket.
+
+JSON stays the default. Clients that offer the ``boing.location.v1``
+WebSocket subprotocol at connect switch to binary frames instead, where each
+point is a fixed 18-byte little-endian record:
+
+    int32  latitude  * 1e7   (~1 cm resolution)
+    int32  longitude * 1e7
+    int64  timestamp, ms since the Unix epoch
+    uint16 accuracy, decimetres (0 = unknown)
+
+A frame may hold any number of records back to back, so a client can flush
+several buffered points at once. The server sends the same records.
+
+The caregiver socket (``ws/caregiver/``) batches updates for several users
+into one frame. Its binary records are the same fields prefixed with a
+uint32 user id (22 bytes each).
+
+Browsers that authenticate with a ``bearer.<token>`` subprotocol must also
+offer one the server can select, so ``boing.location.json`` names the
+default JSON format explicitly.
+"""
+import datetime
+import json
+import math
+import struct
+
+BINARY_SUBPROTOCOL = "boing.location.v1"
+JSON_SUBPROTOCOL = "boing.location.json"
+
+POINT = struct.Struct("<iiqH")
+USER_POINT = struct.Struct("<IiiqH")
+SCALE = 10_000_000
+
+
+# Timestamps must convert to a datetime: the Unix epoch to the end of year 9999.
+MAX_TIMESTAMP_MS = 253402300799999
+
+
+def check_point(latitude, longitude, timestamp_ms):
+    """Raises ValueError unless the coordinates are on Earth and the timestamp is usable."""
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"Coordinates out of range: {latitude}, {longitude}")
+    if timestamp_ms is not None and not 0 <= timestamp_ms <= MAX_TIMESTAMP_MS:
+        raise ValueError(f"Timestamp out of range: {timestamp_ms}")
+
+
+def check_recent(points, now_ms, max_age_ms, max_ahead_ms):
+    """Raises ValueError if any timestamp is more than ``max_age_ms`` before
+    ``now_ms`` or ``max_ahead_ms`` after it; ``None`` timestamps pass."""
+    for _, _, timestamp_ms, _ in points:
+        if timestamp_ms is not None and not now_ms - max_age_ms <= timestamp_ms <= now_ms + max_ahead_ms:
+            raise ValueError(f"Timestamp too far from the server's clock: {timestamp_ms}")
+
+
+def decode_points(data):
+    """Returns ``[(latitude, longitude, timestamp_ms, accuracy_m), ...]`` from a binary frame.
+
+    The whole frame is checked before any point is returned.
+    """
+    if not data or len(data) % POINT.size:
+        raise ValueError(f"Binary location frames must be a multiple of {POINT.size} bytes")
+    points = [
+        (lat / SCALE, lon / SCALE, timestamp_ms, accuracy_dm / 10)
+        for lat, lon, timestamp_ms, accuracy_dm in POINT.iter_unpack(data)
+    ]
+    for latitude, longitude, timestamp_ms, _ in points:
+        check_point(latitude, longitude, timestamp_ms)
+    return points
+
+
+def encode_point(latitude, longitude, timestamp_ms, accuracy=0.0):
+    return POINT.pack(
+        round(latitude * SCALE), round(longitude * SCALE), timestamp_ms, min(round(accuracy * 10), 0xFFFF)
+    )
+
+
+def encode_user_point(user_id, latitude, longitude, timestamp_ms, accuracy=0.0):
+    return USER_POINT.pack(
+        int(user_id), round(latitude * SCALE), round(longitude * SCALE), timestamp_ms, min(round(accuracy * 10), 0xFFFF)
+    )
+
+
+def decode_user_points(data):
+    """Yields ``(user_id, latitude, longitude, timestamp_ms, accuracy_m)`` from a caregiver frame."""
+    if len(data) % USER_POINT.size:
+        raise ValueError(f"Binary caregiver frames must be a multiple of {USER_POINT.size} bytes")
+    for user_id, lat, lon, timestamp_ms, accuracy_dm in USER_POINT.iter_unpack(data):
+        yield str(user_id), lat / SCALE, lon / SCALE, timestamp_ms, accuracy_dm / 10
+
+
+def _number(data, key, default=None):
+    value = data.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{key} must be a finite number")
+    return value
+
+
+def decode_json(text):
+    """Parses a JSON ping; returns ``(latitude, longitude, timestamp_ms or None, accuracy_m)``.
+
+    Raises ValueError for anything that isn't a well-formed, in-range point;
+    negative accuracies are clamped to 0.
+    """
+    data = json.loads(text)
+    if not isinstance(data, dict) or "lat" not in data or "lon" not in data:
+        raise ValueError('Expected {"lat": ..., "lon": ...}')
+    latitude, longitude = float(_number(data, "lat")), float(_number(data, "lon"))
+    timestamp_ms = _number(data, "timestamp")
+    if timestamp_ms is not None:
+        timestamp_ms = int(timestamp_ms)
+    accuracy = max(0.0, float(_number(data, "accuracy", 0.0)))
+    check_point(latitude, longitude, timestamp_ms)
+    return latitude, longitude, timestamp_ms, accuracy
+
+
+def encode_json(latitude, longitude):
+    return json.dumps({"latitude": latitude, "longitude": longitude})
+
+
+def to_datetime(timestamp_ms):
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=datetime.timezone.utc)
+
+
+def to_millis(timestamp):
+    return int(timestamp.timestamp() * 1000)
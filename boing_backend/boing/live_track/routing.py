@@ -1,6 +1,7 @@
 from django.urls import re_path
-from .consumers import LiveLocationConsumer
+from .consumers import CaregiverLocationConsumer, LiveLocationConsumer
 
 websocket_urlpatterns = [
     re_path(r"ws/location/(?P<user_id>\w+)/$", LiveLocationConsumer.as_asgi()),
+    re_path(r"ws/caregiver/$", CaregiverLocationConsumer.as_asgi()),
 ]
\ No newline at end of file
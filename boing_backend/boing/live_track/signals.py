@@ -0,0 +1,20 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .geofence import geofence_index
+from .models import Geofence
+
+
+@receiver([post_save, post_delete], sender=Geofence)
+def geofence_changed(sender, instance, **kwargs):
+    """Drops the user's cached fences here and, via their group, in every worker tracking them."""
+    user_id = str(instance.user_id)
+    geofence_index.invalidate(user_id)
+
+    def notify():
+        async_to_sync(get_channel_layer().group_send)(f"geofence_{user_id}", {"type": "geofence_changed"})
+
+    transaction.on_commit(notify)
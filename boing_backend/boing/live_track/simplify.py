@@ -0,0 +1,52 @@
+import math
+
+from .coalesce import EARTH_RADIUS_M
+
+
+def douglas_peucker(points, tolerance):
+    """Simplifies a ``(timestamp, latitude, longitude)`` polyline.
+
+    Keeps the endpoints and every point that lies more than ``tolerance``
+    metres from the simplified line. Coordinates are projected to a local
+    equirectangular plane, which is accurate enough at trail scale, and the
+    recursion runs on an explicit stack so long trails can't hit the
+    recursion limit.
+    """
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return list(points)
+
+    ky = EARTH_RADIUS_M * math.pi / 180
+    kx = ky * math.cos(math.radians(points[0][1]))
+    xs = [p[2] * kx for p in points]
+    ys = [p[1] * ky for p in points]
+    tolerance2 = tolerance * tolerance
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = xs[first], ys[first]
+        dx, dy = xs[last] - x1, ys[last] - y1
+        length2 = dx * dx + dy * dy
+
+        farthest, index = tolerance2, None
+        for i in range(first + 1, last):
+            px, py = xs[i] - x1, ys[i] - y1
+            t = (px * dx + py * dy) / length2 if length2 else 0.0
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            ex, ey = px - t * dx, py - t * dy
+            distance2 = ex * ex + ey * ey
+            if distance2 > farthest:
+                farthest, index = distance2, i
+
+        if index is not None:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [p for p, kept in zip(points, keep) if kept]
@@ -1,3 +1,663 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import threading
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from authing.models import User
+from live_track import protocol, writer
+from live_track.buckets import bucket_updates, from_millis, to_millis
+from live_track.coalesce import LocationCoalescer, haversine
+from live_track.consumers import load_fences
+from live_track.geofence import CircleFence, GeofenceIndex, PolygonFence, geofence_index
+from live_track.middleware import JWTAuthMiddleware
+from live_track.models import Geofence
+from live_track.routing import websocket_urlpatterns
+from live_track.simplify import douglas_peucker
+from live_track.views import encode_cursor
+from live_track.writer import LocationWriter
+from rest_framework_simplejwt.tokens import AccessToken
+
+application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+def connect_as(user, tracked_id, **kwargs):
+    return connect_to(user, f"/ws/location/{tracked_id}/", **kwargs)
+
+
+def connect_to(user, path, **kwargs):
+    return WebsocketCommunicator(application, f"{path}?token={AccessToken.for_user(user)}", **kwargs)
+
+
+class LocationWriterTestCase(SimpleTestCase):
+    async def test_flushes_in_batches(self):
+        batches = []
+        location_writer = LocationWriter(insert=lambda points: batches.append(len(points)), batch_size=500)
+        for i in range(1200):
+            await location_writer.put("42", 12.97, 77.59, i)
+        await location_writer.join()
+        self.assertEqual(batches, [500, 500, 200])
+        location_writer.task.cancel()
+
+    async def test_flushes_partial_batch_after_interval(self):
+        batches = []
+        location_writer = LocationWriter(insert=batches.append, flush_interval=0.05)
+        await location_writer.put("42", 12.97, 77.59, 0)
+        await asyncio.sleep(0.2)
+        self.assertEqual(batches, [[("42", 12.97, 77.59, 0)]])
+        location_writer.task.cancel()
+
+    async def test_insert_errors_do_not_stop_the_writer(self):
+        batches = []
+
+        def insert(points):
+            if not batches:
+                batches.append(None)
+                raise RuntimeError("mongo down")
+            batches.append(points)
+
+        location_writer = LocationWriter(insert=insert, flush_interval=0.01)
+        with self.assertLogs("live_track.writer", level="ERROR"):
+            await location_writer.put("42", 1.0, 2.0, 0)
+            await location_writer.join()
+        await location_writer.put("42", 3.0, 4.0, 1)
+        await location_writer.join()
+        self.assertEqual(batches[1], [("42", 3.0, 4.0, 1)])
+        location_writer.task.cancel()
+
+
+class LocationBucketTestCase(SimpleTestCase):
+    def test_groups_points_per_user_and_bucket(self):
+        hour = 3600 * 1000
+        points = [
+            ("42", 1.0, 2.0, from_millis(hour + 2000)),
+            ("42", 1.1, 2.1, from_millis(hour + 1000)),
+            ("42", 1.2, 2.2, from_millis(2 * hour + 5)),
+            ("7", 3.0, 4.0, from_millis(hour + 1500)),
+        ]
+        updates = {
+            (op._filter["user_id"], op._filter["start"]): op._doc
+            for op in bucket_updates(points, bucket_seconds=3600)
+        }
+        self.assertEqual(len(updates), 3)
+
+        first = updates["42", from_millis(hour)]
+        self.assertEqual(first["$push"]["timestamps"]["$each"], [hour + 1000, hour + 2000])
+        self.assertEqual(first["$push"]["latitudes"]["$each"], [1.1, 1.0])
+        self.assertEqual(first["$inc"], {"count": 2})
+        self.assertEqual(first["$max"], {"end": from_millis(hour + 2000)})
+        self.assertEqual(updates["42", from_millis(2 * hour)]["$inc"], {"count": 1})
+
+
+def at(ms):
+    return datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(milliseconds=ms)
+
+
+class LocationCoalescerTestCase(SimpleTestCase):
+    def test_haversine(self):
+        # One degree of latitude is about 111.2 km.
+        self.assertAlmostEqual(haversine(12.0, 77.0, 13.0, 77.0), 111195, delta=10)
+
+    async def test_drops_points_closer_than_min_distance(self):
+        published = []
+
+        async def publish(*point):
+            published.append(point)
+
+        coalescer = LocationCoalescer(publish, min_interval=0, min_distance=5)
+        await coalescer.offer(12.971598, 77.594566, at(0))
+        await coalescer.offer(12.971600, 77.594566, at(1))   # ~0.2 m away
+        await coalescer.offer(12.971700, 77.594566, at(2))   # ~11 m away
+        self.assertEqual([p[2] for p in published], [at(0), at(2)])
+        self.assertEqual(coalescer.dropped, 1)
+
+    async def test_publishes_latest_point_per_interval(self):
+        published = []
+
+        async def publish(*point):
+            published.append(point)
+
+        coalescer = LocationCoalescer(publish, min_interval=0.1, min_distance=0)
+        for i in range(5):
+            await coalescer.offer(12.0 + i / 1000, 77.0, at(i))
+        self.assertEqual([p[2] for p in published], [at(0)])
+        await asyncio.sleep(0.2)
+        self.assertEqual([p[2] for p in published], [at(0), at(4)])
+        self.assertEqual(coalescer.merged, 3)
+        await coalescer.close()
+
+    async def test_close_publishes_held_point(self):
+        published = []
+
+        async def publish(*point):
+            published.append(point)
+
+        coalescer = LocationCoalescer(publish, min_interval=10, min_distance=0)
+        await coalescer.offer(12.0, 77.0, at(0))
+        await coalescer.offer(12.001, 77.0, at(1))
+        await coalescer.close()
+        self.assertEqual([p[2] for p in published], [at(0), at(1)])
+
+    async def test_batches_are_thinned_on_their_own_timestamps(self):
+        published = []
+
+        async def publish(*point):
+            published.append(point)
+
+        # Ten points recorded half a second apart, arriving all at once.
+        coalescer = LocationCoalescer(publish, min_interval=1.0, min_distance=0)
+        for i in range(10):
+            await coalescer.offer(12.0 + i / 1000, 77.0, at(500 * i))
+        await coalescer.close()
+        self.assertEqual([p[2] for p in published], [at(ms) for ms in (0, 1000, 2000, 3000, 4000, 4500)])
+        self.assertEqual(coalescer.merged, 4)
+
+
+class DouglasPeuckerTestCase(SimpleTestCase):
+    def test_drops_points_on_a_straight_line(self):
+        line = [(i, 12.0 + i / 10000, 77.0) for i in range(100)]
+        self.assertEqual(douglas_peucker(line, tolerance=1), [line[0], line[-1]])
+
+    def test_keeps_corners(self):
+        # North ~110 m, then east ~110 m.
+        line = [(i, 12.0 + min(i, 10) / 10000, 77.0 + max(i - 10, 0) / 10000) for i in range(21)]
+        self.assertEqual([p[0] for p in douglas_peucker(line, tolerance=5)], [0, 10, 20])
+        self.assertEqual(douglas_peucker(line, tolerance=0), line)
+
+
+class GeofenceIndexTestCase(SimpleTestCase):
+    def test_polygon_contains(self):
+        square = PolygonFence(1, "home", [(12.0, 77.0), (12.0, 77.01), (12.01, 77.01), (12.01, 77.0)])
+        self.assertTrue(square.contains(12.005, 77.005))
+        self.assertFalse(square.contains(12.005, 77.02))
+
+    def test_only_transitions_fire(self):
+        index = GeofenceIndex(cell_size=0.01)
+        home = CircleFence(1, "home", 12.0, 77.0, 100)
+        park = CircleFence(2, "park", 12.005, 77.0, 100)
+        index.load("42", [home, park])
+
+        self.assertEqual(index.evaluate("42", 12.0, 77.0), [])            # first point sets the state
+        self.assertEqual(index.evaluate("42", 12.0001, 77.0), [])         # still inside home
+        self.assertEqual(index.evaluate("42", 12.0025, 77.0), [(home, "exit")])
+        self.assertEqual(index.evaluate("42", 12.005, 77.0), [(park, "enter")])
+        self.assertEqual(index.evaluate("7", 12.0, 77.0), [])             # no fences for this user
+
+    def test_large_fences_are_checked_everywhere(self):
+        index = GeofenceIndex(cell_size=0.01, max_cells=4)
+        city = CircleFence(1, "city", 12.0, 77.0, 20000)
+        index.load("42", [city])
+        self.assertEqual(index._large["42"], [city])
+        index.evaluate("42", 12.3, 77.3)
+        self.assertEqual(index.evaluate("42", 12.05, 77.05), [(city, "enter")])
+
+
+class GeofenceSignalTestCase(TestCase):
+    def test_saving_a_fence_invalidates_the_index(self):
+        user = User.objects.create(name="Gran", phone="9000000002", email="gran@example.com", role="elderly")
+        geofence_index.load(str(user.pk), [])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Geofence.objects.create(user=user, name="home", latitude=12.0, longitude=77.0, radius=100)
+        self.assertFalse(geofence_index.is_loaded(str(user.pk)))
+        self.assertEqual(len(callbacks), 1)
+
+
+class GeofenceValidationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="Gran", phone="9000000002", email="gran@example.com", role="elderly")
+
+    def test_incomplete_shapes_are_rejected(self):
+        for fields in (
+            {"shape": "circle", "latitude": 12.0, "longitude": 77.0},
+            {"shape": "circle", "latitude": 95.0, "longitude": 77.0, "radius": 100},
+            {"shape": "polygon"},
+        ):
+            with self.subTest(**fields), self.assertRaises(IntegrityError), transaction.atomic():
+                Geofence.objects.create(user=self.user, name="bad", **fields)
+
+        with self.assertRaises(ValidationError):
+            Geofence(user=self.user, name="bad", shape="polygon", vertices=[[12.0, 77.0], [12.1, 77.0]]).clean()
+        with self.assertRaises(ValidationError):
+            Geofence(user=self.user, name="bad", shape="polygon", vertices=[[12.0, 77.0], "x", [12.1, 77.1]]).clean()
+
+    def test_load_fences_skips_bad_rows(self):
+        Geofence.objects.create(user=self.user, name="line", shape="polygon", vertices=[[12.0, 77.0], [12.1, 77.0]])
+        home = Geofence.objects.create(user=self.user, name="home", latitude=12.0, longitude=77.0, radius=100)
+        with self.assertLogs("live_track.consumers", "WARNING"):
+            fences = async_to_sync(load_fences)(str(self.user.pk))
+        self.assertEqual([fence.id for fence in fences], [home.pk])
+
+
+async def read_all(content):
+    return b"".join([part async for part in content])
+
+
+class LocationHistoryViewTestCase(TestCase):
+    def setUp(self):
+        self.caregiver = User.objects.create_user("Carer", "9000000001", "carer@example.com", "pw", "caregiver")
+        self.elderly = User.objects.create_user("Gran", "9000000002", "gran@example.com", "pw", "elderly")
+        self.elderly.emergency_contact = self.caregiver.phone
+        self.elderly.save()
+        self.stranger = User.objects.create_user("Other", "9000000003", "other@example.com", "pw", "caregiver")
+        self.client = APIClient()
+        # A straight walk north with one detour east in the middle.
+        self.trail = [(1000 * i, 12.0 + i / 10000, 77.0 + (0.001 if i == 50 else 0)) for i in range(100)]
+
+    def points_between(self, user_id, start, end):
+        return (point for point in self.trail if to_millis(start) <= point[0] < to_millis(end))
+
+    def get(self, user, url=None, **params):
+        self.client.force_authenticate(user)
+        if url is None:
+            url = f"/location/{self.elderly.pk}/history/"
+            params.setdefault("start", "1970-01-01T00:00:00Z")
+        with mock.patch("live_track.views.points_between", self.points_between):
+            response = self.client.get(url, params)
+        if response.status_code != 200:
+            return response, None
+        # Async, so ASGI servers stream it instead of buffering it whole.
+        self.assertTrue(response.is_async)
+        return response, json.loads(async_to_sync(read_all)(response.streaming_content))
+
+    def test_caregiver_gets_simplified_trail(self):
+        response, body = self.get(self.caregiver, tolerance=5)
+        self.assertEqual(body["user_id"], str(self.elderly.pk))
+        self.assertEqual([p[0] for p in body["points"]], [0, 49000, 50000, 51000, 99000])
+        self.assertIsNone(body["next"])
+
+    def test_pages_with_a_cursor(self):
+        response, body = self.get(self.caregiver, tolerance=0, limit=30)
+        self.assertEqual(len(body["points"]), 30)
+        self.assertIn("cursor=", body["next"])
+
+    def test_cursor_resumes_within_a_millisecond(self):
+        # Points sharing a timestamp straddle the page boundaries.
+        self.trail = [(1000, 12.0, 77.0), (2000, 12.1, 77.0), (2000, 12.2, 77.0), (2000, 12.3, 77.0),
+                      (2000, 12.4, 77.0), (3000, 12.5, 77.0)]
+        pages, url, params = [], None, {"tolerance": 0, "limit": 2}
+        while True:
+            response, body = self.get(self.caregiver, url, **params)
+            pages.append(body["points"])
+            if body["next"] is None:
+                break
+            url, params = body["next"], {}
+        self.assertEqual([tuple(point) for page in pages for point in page], self.trail)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 0])
+
+    def test_bad_cursors_are_rejected(self):
+        for cursor in ("not-a-cursor", encode_cursor(10 ** 18, 0), encode_cursor(1000, -1)):
+            response, _ = self.get(self.caregiver, cursor=cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_other_users_are_forbidden(self):
+        response, _ = self.get(self.stranger)
+        self.assertEqual(response.status_code, 403)
+
+
+class LocationWriterMixin:
+    """Lets a test run its own LocationWriter, stopped when the test ends, pass or fail."""
+
+    def start_writer(self, insert=lambda points: None):
+        writer._writer = LocationWriter(insert=insert, flush_interval=0.01)
+        self.addCleanup(self.stop_writer)
+        return writer._writer
+
+    def stop_writer(self):
+        if writer._writer is not None:
+            writer._writer.task.cancel()
+            writer._writer = None
+
+
+@override_settings(LOCATION_MIN_INTERVAL_MS=0, LOCATION_MIN_DISTANCE_M=0)
+class LiveLocationConsumerTestCase(LocationWriterMixin, TestCase):
+    def setUp(self):
+        writer._writer = None
+        self.elderly = User.objects.create(name="Gran", phone="9000000002", email="gran@example.com", role="elderly")
+        self.user_id = str(self.elderly.pk)
+
+    async def test_slow_writes_do_not_block_broadcast(self):
+        written = []
+
+        def slow_insert(points):
+            time.sleep(0.5)
+            written.extend(points)
+
+        location_writer = self.start_writer(slow_insert)
+        communicator = connect_as(self.elderly, self.user_id)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        start = time.monotonic()
+        for _ in range(3):
+            await communicator.send_to(text_data=json.dumps({"lat": 12.97, "lon": 77.59}))
+            message = json.loads(await communicator.receive_from())
+            self.assertEqual(message, {"latitude": 12.97, "longitude": 77.59})
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        await location_writer.join()
+        self.assertEqual([point[0] for point in written], [self.user_id] * 3)
+        await communicator.disconnect()
+
+    async def test_binary_subprotocol_batches(self):
+        self.start_writer()
+        communicator = connect_as(self.elderly, self.user_id, subprotocols=[protocol.BINARY_SUBPROTOCOL])
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, protocol.BINARY_SUBPROTOCOL)
+
+        sent_ms = protocol.to_millis(now())
+        frame = b"".join(protocol.encode_point(12.97 + i / 1000, 77.59, sent_ms + i, 4.5) for i in range(3))
+        self.assertEqual(len(frame), 3 * protocol.POINT.size)
+        await communicator.send_to(bytes_data=frame)
+        for i in range(3):
+            data = await communicator.receive_from()
+            [(latitude, longitude, timestamp_ms, accuracy)] = protocol.decode_points(data)
+            self.assertAlmostEqual(latitude, 12.97 + i / 1000, places=7)
+            self.assertAlmostEqual(longitude, 77.59, places=7)
+            self.assertEqual(timestamp_ms, sent_ms + i)
+            self.assertEqual(accuracy, 4.5)
+
+        await communicator.disconnect()
+
+    @override_settings(LOCATION_MIN_INTERVAL_MS=1000, LOCATION_MIN_DISTANCE_M=5.0)
+    async def test_buffered_batch_is_stored_at_the_default_interval(self):
+        written = []
+        location_writer = self.start_writer(written.extend)
+        communicator = connect_as(self.elderly, self.user_id, subprotocols=[protocol.BINARY_SUBPROTOCOL])
+        self.assertTrue((await communicator.connect())[0])
+
+        # A minute the phone spent offline, one point every ten seconds.
+        start_ms = protocol.to_millis(now()) - 60000
+        frame = b"".join(
+            protocol.encode_point(12.97 + i / 1000, 77.59, start_ms + 10000 * i, 4.5) for i in range(6)
+        )
+        await communicator.send_to(bytes_data=frame)
+        for _ in range(6):
+            await communicator.receive_from()
+        await location_writer.join()
+
+        self.assertEqual(
+            [(round(latitude, 3), protocol.to_millis(timestamp)) for _, latitude, _, timestamp in written],
+            [(round(12.97 + i / 1000, 3), start_ms + 10000 * i) for i in range(6)],
+        )
+        await communicator.disconnect()
+
+    async def test_rejects_timestamps_far_from_now(self):
+        written = []
+        self.start_writer(written.extend)
+        communicator = connect_as(self.elderly, self.user_id, subprotocols=[protocol.BINARY_SUBPROTOCOL])
+        self.assertTrue((await communicator.connect())[0])
+
+        now_ms = protocol.to_millis(now())
+        for timestamp_ms in (0, now_ms - 8 * 86400 * 1000, now_ms + 3600 * 1000, protocol.MAX_TIMESTAMP_MS):
+            await communicator.send_to(bytes_data=protocol.encode_point(12.97, 77.59, timestamp_ms, 0))
+            self.assertEqual(json.loads(await communicator.receive_from())["type"], "error")
+        self.assertEqual(written, [])
+        await communicator.disconnect()
+
+    async def test_geofence_exit_is_broadcast(self):
+        self.start_writer()
+        home = await Geofence.objects.acreate(user=self.elderly, name="home", latitude=12.0, longitude=77.0, radius=100)
+
+        communicator = connect_as(self.elderly, self.user_id)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        for lat in (12.0, 12.01):
+            await communicator.send_to(text_data=json.dumps({"lat": lat, "lon": 77.0}))
+            self.assertEqual(json.loads(await communicator.receive_from())["latitude"], lat)
+        event = json.loads(await communicator.receive_from())
+        self.assertEqual((event["type"], event["fence_id"], event["transition"]), ("geofence", home.pk, "exit"))
+
+        await communicator.disconnect()
+        geofence_index.invalidate(self.user_id)
+
+    async def test_rejects_unauthenticated_and_unrelated_users(self):
+        stranger = await User.objects.acreate(name="Other", phone="9000000003", email="o@example.com", role="caregiver")
+        for communicator in (
+            WebsocketCommunicator(application, f"/ws/location/{self.user_id}/"),
+            WebsocketCommunicator(application, f"/ws/location/{self.user_id}/?token=not-a-jwt"),
+            connect_as(stranger, self.user_id),
+        ):
+            connected, _ = await communicator.connect()
+            self.assertFalse(connected)
+
+    async def test_rejects_inactive_users(self):
+        with mock.patch.object(User, "is_active", False):
+            connected, _ = await connect_as(self.elderly, self.user_id).connect()
+        self.assertFalse(connected)
+
+    async def test_caregiver_watches_but_cannot_publish(self):
+        self.start_writer()
+        caregiver = await User.objects.acreate(name="Carer", phone="9000000001", email="c@example.com", role="caregiver")
+        self.elderly.emergency_contact = caregiver.phone
+        await self.elderly.asave()
+
+        watcher = connect_as(caregiver, self.user_id)
+        self.assertTrue((await watcher.connect())[0])
+        await watcher.send_to(text_data=json.dumps({"lat": 1.0, "lon": 2.0}))
+        self.assertTrue(await watcher.receive_nothing())
+
+        # The token can also ride in as a subprotocol, next to one the server selects.
+        phone = WebsocketCommunicator(
+            application,
+            f"/ws/location/{self.user_id}/",
+            subprotocols=[protocol.JSON_SUBPROTOCOL, "bearer." + str(AccessToken.for_user(self.elderly))],
+        )
+        connected, subprotocol = await phone.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, protocol.JSON_SUBPROTOCOL)
+        await phone.send_to(text_data=json.dumps({"lat": 12.97, "lon": 77.59}))
+        self.assertEqual(json.loads(await watcher.receive_from()), {"latitude": 12.97, "longitude": 77.59})
+
+        await watcher.disconnect()
+        await phone.disconnect()
+
+    def test_rejects_truncated_binary_frames(self):
+        with self.assertRaises(ValueError):
+            list(protocol.decode_points(b"\x00" * (protocol.POINT.size + 1)))
+
+    def test_rejects_malformed_points(self):
+        for ping in (
+            {"lat": "12.97", "lon": 77.59},
+            {"lat": 12.97},
+            {"lat": 91.0, "lon": 77.59},
+            {"lat": 12.97, "lon": 77.59, "accuracy": "far"},
+            {"lat": 12.97, "lon": 77.59, "timestamp": -1},
+            [12.97, 77.59],
+        ):
+            with self.assertRaises(ValueError, msg=ping):
+                protocol.decode_json(json.dumps(ping))
+        with self.assertRaises(ValueError):
+            protocol.decode_json('{"lat": NaN, "lon": 77.59}')
+        self.assertEqual(protocol.decode_json('{"lat": 12, "lon": 77, "accuracy": -3}'), (12.0, 77.0, None, 0.0))
+        with self.assertRaises(ValueError):
+            protocol.decode_points(protocol.POINT.pack(95 * protocol.SCALE, 0, 0, 0))
+
+    async def test_bad_frames_get_an_error_and_are_not_broadcast(self):
+        self.start_writer()
+        communicator = connect_as(self.elderly, self.user_id)
+        self.assertTrue((await communicator.connect())[0])
+        binary_watcher = connect_as(self.elderly, self.user_id, subprotocols=[protocol.BINARY_SUBPROTOCOL])
+        self.assertTrue((await binary_watcher.connect())[0])
+
+        await communicator.send_to(text_data=json.dumps({"lat": 12.97, "lon": 77.59, "accuracy": "far"}))
+        self.assertEqual(json.loads(await communicator.receive_from())["type"], "error")
+        self.assertTrue(await binary_watcher.receive_nothing())
+
+        # The socket stays usable.
+        await communicator.send_to(text_data=json.dumps({"lat": 12.97, "lon": 77.59, "accuracy": -1}))
+        self.assertEqual(json.loads(await communicator.receive_from()), {"latitude": 12.97, "longitude": 77.59})
+        [(_, _, _, accuracy)] = protocol.decode_points(await binary_watcher.receive_from())
+        self.assertEqual(accuracy, 0.0)
+
+        await communicator.disconnect()
+        await binary_watcher.disconnect()
+
+
+@override_settings(LOCATION_MIN_INTERVAL_MS=0, LOCATION_MIN_DISTANCE_M=0, LOCATION_FANIN_FPS=10)
+class CaregiverLocationConsumerTestCase(LocationWriterMixin, TestCase):
+    def setUp(self):
+        self.caregiver = User.objects.create(name="Carer", phone="9000000001", email="c@example.com", role="caregiver")
+        self.gran = User.objects.create(
+            name="Gran", phone="9000000002", email="g@example.com", role="elderly", emergency_contact="9000000001"
+        )
+        self.grandad = User.objects.create(
+            name="Grandad", phone="9000000003", email="gd@example.com", role="elderly", emergency_contact="9000000001"
+        )
+        self.stranger = User.objects.create(name="Other", phone="9000000004", email="o@example.com", role="elderly")
+        writer._writer = None
+        cache.clear()
+
+    async def ping(self, phone, lat):
+        await phone.send_to(text_data=json.dumps({"lat": lat, "lon": 77.0}))
+        await phone.receive_from()  # the phone's own copy of the broadcast
+
+    async def test_batches_latest_point_per_user(self):
+        self.start_writer()
+        caregiver = connect_to(self.caregiver, "/ws/caregiver/")
+        self.assertTrue((await caregiver.connect())[0])
+        self.assertEqual(json.loads(await caregiver.receive_from())["type"], "snapshot")
+        gran = connect_as(self.gran, self.gran.pk)
+        grandad = connect_as(self.grandad, self.grandad.pk)
+        self.assertTrue((await gran.connect())[0])
+        self.assertTrue((await grandad.connect())[0])
+
+        for lat in (12.0, 12.1, 12.2):
+            await self.ping(gran, lat)
+        await self.ping(grandad, 13.0)
+
+        frame = json.loads(await caregiver.receive_from())
+        self.assertEqual(frame["type"], "locations")
+        latest = {u["user_id"]: u["latitude"] for u in frame["updates"]}
+        self.assertEqual(latest, {str(self.gran.pk): 12.2, str(self.grandad.pk): 13.0})
+
+        await caregiver.send_to(text_data=json.dumps({"action": "unsubscribe", "user_ids": [self.grandad.pk]}))
+        await self.ping(grandad, 13.1)
+        self.assertTrue(await caregiver.receive_nothing(0.3))
+
+        for communicator in (caregiver, gran, grandad):
+            await communicator.disconnect()
+
+    async def test_cannot_subscribe_to_unlinked_users(self):
+        caregiver = connect_to(self.caregiver, "/ws/caregiver/", subprotocols=[protocol.BINARY_SUBPROTOCOL])
+        self.assertTrue((await caregiver.connect())[0])
+        await caregiver.receive_from()  # snapshot
+        await caregiver.send_to(text_data=json.dumps({"action": "subscribe", "user_ids": [self.stranger.pk]}))
+        self.assertEqual(json.loads(await caregiver.receive_from())["type"], "error")
+        await caregiver.disconnect()
+
+    async def test_browser_authenticates_with_bearer_subprotocol(self):
+        caregiver = WebsocketCommunicator(
+            application,
+            "/ws/caregiver/",
+            subprotocols=[protocol.JSON_SUBPROTOCOL, "bearer." + str(AccessToken.for_user(self.caregiver))],
+        )
+        connected, subprotocol = await caregiver.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, protocol.JSON_SUBPROTOCOL)
+        self.assertEqual(json.loads(await caregiver.receive_from())["type"], "snapshot")
+        await caregiver.disconnect()
+
+    async def test_binary_frames_carry_user_ids(self):
+        self.start_writer()
+        caregiver = connect_to(self.caregiver, "/ws/caregiver/", subprotocols=[protocol.BINARY_SUBPROTOCOL])
+        self.assertTrue((await caregiver.connect())[0])
+        await caregiver.receive_from()  # snapshot
+        gran = connect_as(self.gran, self.gran.pk)
+        self.assertTrue((await gran.connect())[0])
+        await self.ping(gran, 12.5)
+
+        [(user_id, latitude, *_)] = protocol.decode_user_points(await caregiver.receive_from())
+        self.assertEqual((user_id, latitude), (str(self.gran.pk), 12.5))
+        await caregiver.disconnect()
+        await gran.disconnect()
+
+    async def test_presence_snapshot_and_endpoint(self):
+        self.start_writer()
+        gran = connect_as(self.gran, self.gran.pk)
+        self.assertTrue((await gran.connect())[0])
+        await self.ping(gran, 12.5)
+
+        caregiver = connect_to(self.caregiver, "/ws/caregiver/")
+        self.assertTrue((await caregiver.connect())[0])
+        snapshot = json.loads(await caregiver.receive_from())
+        users = {user["user_id"]: user for user in snapshot["users"]}
+        self.assertTrue(users[str(self.gran.pk)]["online"])
+        self.assertEqual(users[str(self.gran.pk)]["latitude"], 12.5)
+        self.assertEqual(users[str(self.grandad.pk)], {"user_id": str(self.grandad.pk), "online": False})
+
+        await gran.disconnect()
+        await caregiver.disconnect()
+
+        client = APIClient()
+        client.force_authenticate(self.caregiver)
+        response = await database_sync_to_async(client.get)("/location/presence/")
+        users = {user["user_id"]: user for user in response.json()}
+        self.assertFalse(users[str(self.gran.pk)]["online"])
+        self.assertEqual(users[str(self.gran.pk)]["latitude"], 12.5)
+        self.assertIn("last_seen", users[str(self.gran.pk)])
+
+
+try:
+    from fakeredis import TcpFakeServer
+except ImportError:
+    TcpFakeServer = None
+
+
+@unittest.skipUnless(TcpFakeServer, "fakeredis is not installed")
+class SharedChannelLayerTestCase(TestCase):
+    """Group messages reach consumers attached to a different layer instance, as across workers."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.redis_url = "redis://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    async def test_group_send_from_another_worker(self):
+        from channels_redis.pubsub import RedisPubSubChannelLayer
+
+        user = await User.objects.acreate(name="Gran", phone="9000000002", email="gran@example.com", role="elderly")
+
+        layers = {
+            "default": {
+                "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+                "CONFIG": {"hosts": [self.redis_url]},
+            }
+        }
+        with override_settings(CHANNEL_LAYERS=layers, LOCATION_MIN_INTERVAL_MS=0, LOCATION_MIN_DISTANCE_M=0):
+            communicator = connect_as(user, user.pk)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await asyncio.sleep(0.1)
+
+            other_worker = RedisPubSubChannelLayer(hosts=[self.redis_url])
+            await other_worker.group_send(
+                f"location_{user.pk}", {"type": "send_location", "latitude": 1.5, "longitude": 2.5}
+            )
+            message = json.loads(await communicator.receive_from(timeout=2))
+            self.assertEqual(message, {"latitude": 1.5, "longitude": 2.5})
+
+            await communicator.disconnect()
+            await other_worker.flush()
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import LocationHistoryView, PresenceView
+
+urlpatterns = [
+    path("presence/", PresenceView.as_view(), name="location-presence"),
+    path("<str:user_id>/history/", LocationHistoryView.as_view(), name="location-history"),
+]
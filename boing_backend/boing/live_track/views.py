@@ -1,3 +1,151 @@
-from django.shortcuts import render
+import base64
+import datetime
+import itertools
+import json
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from . import presence
+from .buckets import from_millis, points_between
+from .permissions import can_track, tracked_user_ids
+from .simplify import douglas_peucker
+
+CHUNK_SIZE = 5000
+
+
+def encode_cursor(timestamp_ms, offset):
+    """The next page starts at ``timestamp_ms``, after the ``offset`` points
+    with that timestamp already sent (several can share a millisecond)."""
+    return base64.urlsafe_b64encode(f"{timestamp_ms}:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    timestamp_ms, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+    timestamp_ms, offset = int(timestamp_ms), int(offset)
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return timestamp_ms, offset
+
+
+def parse_time(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid datetime: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+class LocationHistoryView(APIView):
+    """A user's stored trail between ``start`` and ``end`` (ISO 8601, default the last 24 h).
+
+    The trail is simplified with Douglas-Peucker to ``tolerance`` metres
+    (default 10, 0 returns every point) and streamed as
+    ``{"user_id", "points": [[timestamp_ms, lat, lon], ...], "next"}``.
+    Each page reads at most ``limit`` stored points; ``next`` is the URL of
+    the following page, or null.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 100000
+    max_limit = 500000
+
+    def get(self, request, user_id):
+        if not can_track(request.user, user_id):
+            return Response({"error": "Not allowed to view this user's location"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            end = parse_time(request.query_params["end"]) if "end" in request.query_params else now()
+            start = (parse_time(request.query_params["start"]) if "start" in request.query_params
+                     else end - datetime.timedelta(days=1))
+            cursor = None, 0
+            if "cursor" in request.query_params:
+                try:
+                    cursor = decode_cursor(request.query_params["cursor"])
+                    start = from_millis(cursor[0])
+                except (ValueError, OverflowError, OSError):
+                    raise ValueError("Invalid cursor")
+            tolerance = float(request.query_params.get("tolerance", 10))
+            limit = min(int(request.query_params.get("limit", self.default_limit)), self.max_limit)
+        except (ValueError, TypeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The page starts at the cursor's millisecond; skip what was already sent.
+        points = itertools.islice(points_between(str(user_id), start, end), cursor[1], None)
+        return StreamingHttpResponse(
+            self.stream(self.render(request, str(user_id), points, tolerance, limit, cursor)),
+            content_type="application/json",
+        )
+
+    @staticmethod
+    async def stream(parts):
+        """Serves ``render`` as an async iterator, reading each part in a thread.
+
+        Under ASGI, Django buffers a sync iterator into a list before sending
+        it, which would hold the whole trail in memory.
+        """
+        next_part = sync_to_async(next, thread_sensitive=False)
+        while (part := await next_part(parts, None)) is not None:
+            yield part
+
+    def render(self, request, user_id, points, tolerance, limit, cursor=(None, 0)):
+        yield '{"user_id": %s, "points": [' % json.dumps(user_id)
+
+        # Each chunk is simplified on its own, starting from the last point of
+        # the previous one so the joined line has no gaps.
+        chunk, previous, read, first = [], None, 0, True
+        # The last timestamp read, and how many points with it have been sent.
+        last_ms, sent_at_last = cursor
+        for point in points:
+            chunk.append(point)
+            read += 1
+            if point[0] == last_ms:
+                sent_at_last += 1
+            else:
+                last_ms, sent_at_last = point[0], 1
+            if len(chunk) >= CHUNK_SIZE or read >= limit:
+                text, previous = self.simplify_chunk(chunk, previous, tolerance, first)
+                if text:
+                    yield text
+                    first = False
+                chunk = []
+            if read >= limit:
+                break
+        if chunk:
+            text, previous = self.simplify_chunk(chunk, previous, tolerance, first)
+            if text:
+                yield text
+
+        next_url = None
+        if read >= limit and previous is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", encode_cursor(last_ms, sent_at_last)
+            )
+        yield '], "next": %s}' % json.dumps(next_url)
+
+    @staticmethod
+    def simplify_chunk(chunk, previous, tolerance, first):
+        line = douglas_peucker([previous] + chunk if previous is not None else chunk, tolerance)
+        if previous is not None:
+            line = line[1:]
+        text = ", ".join(json.dumps(point) for point in line)
+        if text and not first:
+            text = ", " + text
+        return text, chunk[-1]
+
+
+class PresenceView(APIView):
+    """Online state and last known position of every user the caller may track."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(list(presence.snapshot(tracked_user_ids(request.user)).values()), status=status.HTTP_200_OK)
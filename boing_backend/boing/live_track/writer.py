@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from django.conf import settings
+
+from .buckets import append_points
+
+logger = logging.getLogger(__name__)
+
+
+def insert_locations(points):
+    """Appends ``(user_id, latitude, longitude, timestamp)`` tuples to their LocationBuckets in one round trip."""
+    append_points(points)
+
+
+class LocationWriter:
+    """Buffers location pings in memory and writes them in bulk off the event loop.
+
+    Consumers only ``await put(...)``. A background task collects points until
+    ``batch_size`` are waiting or ``flush_interval`` seconds have passed since
+    the first one, then runs ``insert`` on a worker thread. When the queue is
+    full, ``put`` waits, which slows producers down instead of growing memory.
+    """
+
+    def __init__(self, insert=insert_locations, batch_size=500, flush_interval=0.2, max_pending=10000):
+        self.insert = insert
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.loop = asyncio.get_running_loop()
+        self.task = self.loop.create_task(self._run())
+
+    async def put(self, user_id, latitude, longitude, timestamp):
+        await self.queue.put((user_id, latitude, longitude, timestamp))
+
+    async def join(self):
+        """Waits until everything put so far has been written."""
+        await self.queue.join()
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = self.loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await asyncio.to_thread(self.insert, batch)
+            except Exception:
+                logger.exception("Failed to write %d location points", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+_writer = None
+
+
+def get_location_writer():
+    """Returns the writer for the running event loop, starting it on first use."""
+    global _writer
+    if _writer is None or _writer.loop is not asyncio.get_running_loop():
+        _writer = LocationWriter(
+            batch_size=settings.LOCATION_FLUSH_BATCH_SIZE,
+            flush_interval=settings.LOCATION_FLUSH_INTERVAL_MS / 1000,
+            max_pending=settings.LOCATION_MAX_PENDING,
+        )
+    return _writer
@@ -0,0 +1,99 @@
+"""Load test for LiveLocationConsumer: many clients pinging at once.
+
+Runs the consumer in-process against the configured channel layer and
+reports receive-to-broadcast latency per ping. Each client pings every
+``--interval`` seconds (randomly phased), like phones on a GPS tick.
+Database writes go through the real LocationWriter with a fake insert that
+sleeps ``--write-ms`` per batch, so a slow database shows up here the way it
+would under Daphne.
+
+    python loadtest_location.py --clients 2000 --pings 5 --interval 10 --write-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "boing"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boing.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+
+from authing.models import User  # noqa: E402
+from live_track import writer  # noqa: E402
+from live_track.geofence import geofence_index  # noqa: E402
+from live_track.routing import websocket_urlpatterns  # noqa: E402
+from live_track.writer import LocationWriter  # noqa: E402
+
+
+class FakeAuthMiddleware:
+    """Stands in for JWTAuthMiddleware so the test measures broadcast, not token checks."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        user_id = scope["path"].strip("/").split("/")[-1]
+        scope = dict(scope, user=User(pk=int(user_id), role="elderly"), tracked_user_ids=frozenset([user_id]))
+        return await self.inner(scope, receive, send)
+
+
+async def client(application, user_id, pings, interval, latencies):
+    # No fences, preloaded so the first ping doesn't query the database.
+    geofence_index.load(user_id, [])
+    communicator = WebsocketCommunicator(application, f"/ws/location/{user_id}/")
+    connected, _ = await communicator.connect(timeout=30)
+    assert connected
+    await asyncio.sleep(random.uniform(0, interval))
+    for i in range(pings):
+        next_at = time.perf_counter() + interval
+        start = time.perf_counter()
+        # Walk ~20 m per ping so the coalescer's distance filter lets it through.
+        await communicator.send_to(text_data=json.dumps({"lat": 12.971598 + 0.0002 * i, "lon": 77.594566}))
+        await communicator.receive_from(timeout=30)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    await communicator.disconnect()
+
+
+async def main(args):
+    written = []
+
+    def slow_insert(points):
+        time.sleep(args.write_ms / 1000)
+        written.append(len(points))
+
+    writer._writer = LocationWriter(insert=slow_insert)
+    application = FakeAuthMiddleware(URLRouter(websocket_urlpatterns))
+    latencies = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(application, str(i), args.pings, args.interval, latencies) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    await writer._writer.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{args.clients} clients x {args.pings} pings in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} pings/s)")
+    print(f"receive-to-broadcast latency: p50 {1000 * statistics.median(latencies):.2f} ms, "
+          f"p99 {1000 * p99:.2f} ms, max {1000 * latencies[-1]:.2f} ms")
+    print(f"{sum(written)} points written in {len(written)} bulk inserts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--pings", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between pings per client.")
+    parser.add_argument("--write-ms", type=float, default=50.0,
+                        help="Simulated duration of one bulk insert.")
+    asyncio.run(main(parser.parse_args()))
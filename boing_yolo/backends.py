@@ -0,0 +1,97 @@
+"""Inference backends for the fall model.
+
+All backends load through the ultralytics ``YOLO`` wrapper, which runs
+``.onnx`` files on onnxruntime (CPUExecutionProvider without a GPU) and
+OpenVINO model directories on OpenVINO. Pre- and post-processing (letterbox,
+NMS, box rescaling) is shared, so detections match the PyTorch path.
+
+Export once, then pick a backend on the command line:
+
+    python backends.py --int8            # best.onnx and best_int8.onnx
+    python backends.py --format openvino --int8   # calibrated on --data
+    python main.py --backend onnx-int8
+
+bench_backends.py checks that each backend's person detections match the
+PyTorch model's on the bundled clips.
+"""
+import argparse
+import os
+
+from ultralytics import YOLO
+
+MODEL_PATH = 'runs/detect/train7/weights/best.pt'
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8', 'openvino', 'openvino-int8')
+
+# The training set; OpenVINO's INT8 export calibrates activations on it.
+DATA_PATH = 'fall_detection_dataset/data.yaml'
+
+
+def weights_for(weights, backend):
+    """Maps the PyTorch weights path to the exported file for ``backend``."""
+    stem, _ = os.path.splitext(weights)
+    if backend == 'torch':
+        return weights
+    if backend == 'onnx':
+        return stem + '.onnx'
+    if backend == 'onnx-int8':
+        return stem + '_int8.onnx'
+    if backend == 'openvino':
+        return stem + '_openvino_model'
+    if backend == 'openvino-int8':
+        return stem + '_int8_openvino_model'
+    raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+
+def load_model(weights=MODEL_PATH, backend='torch'):
+    path = weights_for(weights, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; export it first with: python backends.py --weights {weights}")
+    return YOLO(path, task='detect')
+
+
+def export(weights=MODEL_PATH, imgsz=640, format='onnx', int8=False, data=DATA_PATH):
+    """Exports ``weights`` and returns the paths written.
+
+    ONNX models get a dynamic batch axis so the multi-camera engine can
+    batch frames. ``int8`` adds a dynamically quantized copy of the ONNX
+    model (weights to int8, activations quantized at run time), which needs
+    no calibration data. OpenVINO's INT8 model is statically quantized and
+    calibrated on the images of ``data``; it is written next to the FP32
+    one, where ``--backend openvino-int8`` loads it.
+    """
+    model = YOLO(weights)
+    if format == 'openvino':
+        written = [model.export(format='openvino', imgsz=imgsz)]
+        if int8:
+            if not os.path.exists(data):
+                raise FileNotFoundError(f"{data} not found; OpenVINO INT8 needs a dataset to calibrate on (--data)")
+            path = model.export(format='openvino', imgsz=imgsz, int8=True, data=data)
+            expected = weights_for(weights, 'openvino-int8')
+            if os.path.abspath(path) != os.path.abspath(expected):
+                raise RuntimeError(f"OpenVINO wrote {path}, but --backend openvino-int8 loads {expected}")
+            written.append(path)
+        return written
+
+    path = model.export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+    written = [path]
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = weights_for(weights, 'onnx-int8')
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8)
+        written.append(int8_path)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the fall model for CPU inference.')
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--format', choices=['onnx', 'openvino'], default='onnx')
+    parser.add_argument('--int8', action='store_true', help='Also write an INT8-quantized model.')
+    parser.add_argument('--data', default=DATA_PATH, help='Dataset YAML to calibrate OpenVINO INT8 on.')
+    args = parser.parse_args()
+
+    for path in export(args.weights, imgsz=args.imgsz, format=args.format, int8=args.int8, data=args.data):
+        print(f"Wrote {path}")
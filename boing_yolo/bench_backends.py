@@ -0,0 +1,112 @@
+"""Compares FPS and p95 latency of the inference backends on the bundled videos.
+
+Each backend is also checked against the PyTorch model: a frame agrees when
+every confident person box (the ones main.py tracks) pairs up with one from
+torch at IoU >= ``--min-iou`` and with confidences within ``--conf-tol``.
+A box only one side reports is forgiven if its confidence is within
+``--conf-tol`` of the 0.80 person gate, since it can fall on either side.
+A backend fails when fewer than ``--min-agreement`` of the frames agree.
+
+    python backends.py --int8
+    python bench_backends.py --backends torch onnx onnx-int8
+"""
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS, MODEL_PATH, load_model
+from postprocess import detections_array, person_candidates
+from tracker import iou
+
+with open('classes.txt', 'r') as f:
+    PERSON_CLASS = f.read().splitlines().index('person')
+MIN_CONF = 0.80
+
+
+def read_frames(path, size=(980, 740), limit=None):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while limit is None or len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, size))
+    cap.release()
+    return frames
+
+
+def bench(model, frames, imgsz, warmup=5):
+    for frame in frames[:warmup]:
+        model(frame, imgsz=imgsz, verbose=False)
+
+    latencies = []
+    start = time.perf_counter()
+    for frame in frames:
+        t = time.perf_counter()
+        model(frame, imgsz=imgsz, verbose=False)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    return len(frames) / total, 1000 * np.percentile(latencies, 95)
+
+
+def people(model, frames, imgsz):
+    """The person candidates main.py would see, per frame."""
+    return [
+        person_candidates(detections_array(model(frame, imgsz=imgsz, verbose=False)[0]),
+                          person_class=PERSON_CLASS, min_conf=MIN_CONF)
+        for frame in frames
+    ]
+
+
+def frame_agrees(expected, got, min_iou, conf_tol):
+    unmatched = list(range(len(got)))
+    for box, conf in zip(expected['box'], expected['conf']):
+        best = max(unmatched, key=lambda j: iou(box, got['box'][j]), default=None)
+        if best is not None and iou(box, got['box'][best]) >= min_iou and abs(conf - got['conf'][best]) <= conf_tol:
+            unmatched.remove(best)
+        elif conf - MIN_CONF > conf_tol:
+            return False
+    return all(got['conf'][j] - MIN_CONF <= conf_tol for j in unmatched)
+
+
+def agreement(expected, got, min_iou, conf_tol):
+    """Fraction of frames whose person boxes agree with ``expected``'s."""
+    agreed = sum(frame_agrees(e, g, min_iou, conf_tol) for e, g in zip(expected, got))
+    return agreed / len(expected) if expected else 1.0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('videos', nargs='*',
+                        default=['fall.mp4', 'videoplayback.mp4', 'falls-in-elderly-people-5-5_53lGT7VQ.mp4'])
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['torch', 'onnx', 'onnx-int8'])
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--frames', type=int, default=300, help='Frames per video (0 for all).')
+    parser.add_argument('--min-iou', type=float, default=0.90, help='Box IoU a person must keep against torch.')
+    parser.add_argument('--conf-tol', type=float, default=0.05, help='Allowed confidence difference from torch.')
+    parser.add_argument('--min-agreement', type=float, default=0.98, help='Fraction of frames that must agree.')
+    args = parser.parse_args()
+
+    videos = {path: read_frames(path, limit=args.frames or None) for path in args.videos}
+    reference_model = load_model(args.weights, 'torch')
+    reference = {path: people(reference_model, frames, args.imgsz) for path, frames in videos.items()}
+
+    failed = False
+    print(f"{'backend':<14} {'video':<42} {'FPS':>7} {'p95 ms':>8} {'agree':>7}")
+    for backend in args.backends:
+        try:
+            model = load_model(args.weights, backend)
+        except FileNotFoundError as e:
+            print(f"{backend:<14} skipped: {e}")
+            continue
+        for path, frames in videos.items():
+            fps, p95 = bench(model, frames, args.imgsz)
+            agreed = agreement(reference[path], people(model, frames, args.imgsz), args.min_iou, args.conf_tol)
+            verdict = '' if agreed >= args.min_agreement else '  FAIL'
+            failed = failed or bool(verdict)
+            print(f"{backend:<14} {path:<42} {fps:>7.1f} {p95:>8.1f} {agreed:>7.1%}{verdict}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,82 @@
+"""Memory and FPS of the frame path before and after the buffer pool.
+
+before: cap.read() allocates a frame, cv2.resize to 980x740 allocates another,
+        and YOLO letterboxes it to the model size again.
+after:  cap.read() reuses one array and the frame is resized once, into a
+        pooled buffer already at the model input size.
+
+    python bench_buffers.py fall.mp4 [--model runs/detect/train7/weights/best.pt]
+"""
+import argparse
+import resource
+import time
+import tracemalloc
+
+import cv2
+
+from buffers import FramePool, input_size
+
+
+def before(path, model, imgsz):
+    cap = cv2.VideoCapture(path)
+    frames = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame = cv2.resize(frame, (980, 740))
+        if model is not None:
+            model(frame, imgsz=imgsz, verbose=False)
+        frames += 1
+    cap.release()
+    return frames
+
+
+def after(path, model, imgsz):
+    cap = cv2.VideoCapture(path)
+    raw, pool = None, None
+    frames = 0
+    while True:
+        ret, raw = cap.read(raw)
+        if not ret:
+            break
+        if pool is None:
+            width, height = input_size(raw.shape, imgsz)
+            pool = FramePool((height, width, 3), size=2)
+        buffer = pool.acquire()
+        cv2.resize(raw, (buffer.shape[1], buffer.shape[0]), dst=buffer, interpolation=cv2.INTER_AREA)
+        if model is not None:
+            model(buffer, imgsz=imgsz, verbose=False)
+        pool.release(buffer)
+        frames += 1
+    cap.release()
+    return frames
+
+
+def measure(run, path, model, imgsz):
+    tracemalloc.start()
+    start = time.perf_counter()
+    frames = run(path, model, imgsz)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return frames / elapsed, peak / 2 ** 20
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('video', nargs='?', default='fall.mp4')
+    parser.add_argument('--model', default=None, help='Include inference with these weights.')
+    parser.add_argument('--imgsz', type=int, default=640)
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        from ultralytics import YOLO
+
+        model = YOLO(args.model)
+
+    for name, run in (('before', before), ('after', after)):
+        fps, peak_mb = measure(run, args.video, model, args.imgsz)
+        print(f"{name:<7} {fps:7.1f} FPS, traced peak {peak_mb:7.1f} MiB")
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
@@ -0,0 +1,70 @@
+"""Microbenchmark: per-box tensor loop vs. vectorized post-processing.
+
+    python bench_postprocess.py [--device cuda]
+"""
+import argparse
+import math
+import timeit
+
+import torch
+from ultralytics.engine.results import Boxes
+
+from postprocess import detections_array, person_candidates
+
+classnames = []
+with open('classes.txt', 'r') as f:
+    classnames = f.read().splitlines()
+
+
+class FakeResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def make_result(n, device):
+    xy = torch.rand(n, 2, device=device) * 900
+    wh = torch.rand(n, 2, device=device) * 300 + 20
+    conf = torch.rand(n, 1, device=device) * 0.5 + 0.5
+    cls = torch.randint(0, 3, (n, 1), device=device).float()
+    data = torch.cat([xy, xy + wh, conf, cls], dim=1)
+    return FakeResult(Boxes(data, orig_shape=(740, 980)))
+
+
+def per_box_loop(result):
+    """The post-processing main.py used to do, one tensor element at a time."""
+    people = []
+    for box in result.boxes:
+        x1, y1, x2, y2 = box.xyxy[0]
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+        confidence = box.conf[0]
+        class_detect = box.cls[0]
+        class_detect = int(class_detect)
+        class_detect = classnames[class_detect]
+        conf = math.ceil(confidence * 100)
+
+        height = y2 - y1
+        width = x2 - x1
+        threshold = height - width
+
+        if conf > 80 and class_detect == 'person':
+            people.append((x1, y1, x2, y2, conf, threshold < 0))
+    return people
+
+
+def vectorized(result):
+    return person_candidates(detections_array(result))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'boxes':>6} {'per-box loop':>14} {'vectorized':>12} {'speedup':>8}")
+    for n in (1, 10, 100):
+        result = make_result(n, args.device)
+        number = max(10, 2000 // n)
+        loop = min(timeit.repeat(lambda: per_box_loop(result), number=number, repeat=args.repeat)) / number
+        vec = min(timeit.repeat(lambda: vectorized(result), number=number, repeat=args.repeat)) / number
+        print(f"{n:>6} {loop * 1e6:>11.1f} us {vec * 1e6:>9.1f} us {loop / vec:>7.1f}x")
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+
+
+def input_size(shape, imgsz=640, stride=32):
+    """Model input (width, height) for a frame of ``shape``.
+
+    The long side becomes ``imgsz`` and the short side keeps the aspect ratio,
+    rounded to the model stride. Frames resized to this size go through the
+    YOLO letterbox without being resized a second time.
+    """
+    h, w = shape[:2]
+    if w >= h:
+        return imgsz, max(stride, round(imgsz * h / w / stride) * stride)
+    return max(stride, round(imgsz * w / h / stride) * stride), imgsz
+
+
+class FramePool:
+    """Fixed set of preallocated image buffers that frames are decoded into.
+
+    ``acquire`` returns ``None`` when every buffer is still in flight, and the
+    caller drops that frame instead of allocating a new one.
+    """
+
+    def __init__(self, shape, size=8, dtype=np.uint8):
+        self.shape = shape
+        self._free = [np.empty(shape, dtype=dtype) for _ in range(size)]
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.exhausted += 1
+            return None
+
+    def release(self, buffer):
+        with self._lock:
+            self._free.append(buffer)
@@ -0,0 +1,222 @@
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from buffers import FramePool, input_size
+from pipeline import Frame, LatestQueue, Stage
+
+
+class CameraStats:
+    """Rolling FPS and end-to-end latency for a single camera."""
+
+    def __init__(self, window=60):
+        self.frames = 0
+        self._stamps = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+
+    def update(self, latency):
+        self.frames += 1
+        self._stamps.append(time.monotonic())
+        self._latencies.append(latency)
+
+    @property
+    def fps(self):
+        if len(self._stamps) < 2:
+            return 0.0
+        span = self._stamps[-1] - self._stamps[0]
+        return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+    @property
+    def latency_ms(self):
+        if not self._latencies:
+            return 0.0
+        return 1000 * sum(self._latencies) / len(self._latencies)
+
+
+class CameraSource:
+    """Decodes one capture source on its own thread and pushes frames to ``outbox``.
+
+    Frames are decoded into one reused array and resized once, straight to
+    the model input size, into a buffer from a per-camera ``FramePool``. When
+    every pooled buffer is still in flight the frame is dropped.
+    """
+
+    def __init__(self, camera_id, source, outbox, imgsz=640, pool_size=8, pace=None):
+        self.camera_id = camera_id
+        self.source = source
+        self.outbox = outbox
+        self.imgsz = imgsz
+        self.pool_size = pool_size
+        self.pool = None
+        # Files decode far faster than real time; pace them at their native FPS
+        # unless told otherwise. Live streams are paced by the camera itself.
+        self.pace = isinstance(source, str) and not source.startswith(("rtsp://", "http://", "https://")) if pace is None else pace
+        self.stats = CameraStats()
+        self.finished = threading.Event()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"capture-{camera_id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            print(f"[{self.camera_id}] Could not open source {self.source!r}", file=sys.stderr)
+            self.finished.set()
+            return
+
+        interval = 0.0
+        if self.pace:
+            source_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            interval = 1.0 / source_fps if source_fps > 0 else 0.0
+
+        raw = None
+        index = 0
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            ret, raw = cap.read(raw)
+            if not ret:
+                break
+            if self.pool is None:
+                width, height = input_size(raw.shape, self.imgsz)
+                self.pool = FramePool((height, width, 3), self.pool_size)
+            buffer = self.pool.acquire()
+            if buffer is not None:
+                cv2.resize(raw, (buffer.shape[1], buffer.shape[0]), dst=buffer, interpolation=cv2.INTER_AREA)
+                self.outbox.put(Frame(self.camera_id, index, time.monotonic(), buffer, pool=self.pool), key=self.camera_id)
+            index += 1
+            if interval:
+                next_at += interval
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+        cap.release()
+        self.finished.set()
+
+
+class MultiCameraEngine:
+    """Runs one shared YOLO model over many cameras as a staged pipeline.
+
+    capture (one thread per camera) -> preprocess -> batched inference ->
+    decide -> render (main thread, optional)
+
+    Stages are linked by keyed ``LatestQueue``s, so a slow stage makes the
+    ones before it drop stale frames instead of queueing them, which keeps
+    detection latency bounded under load. ``decide(frame)`` holds the fall
+    logic and returns the frame to forward it to ``render(frame)``; ``render``
+    returns ``False`` to stop the engine.
+    """
+
+    def __init__(self, model, sources, decide, render=None, imgsz=640, report_interval=5.0, motion_gate=None):
+        self.model = model
+        self.decide = decide
+        self.render = render
+        self.imgsz = imgsz
+        self.report_interval = report_interval
+
+        n = len(sources)
+        self.queues = [
+            LatestQueue("captured", maxsize=n, on_drop=Frame.release),
+            LatestQueue("preprocessed", maxsize=n, on_drop=Frame.release),
+            LatestQueue("inferred", maxsize=n, on_drop=Frame.release),
+            LatestQueue("decided", maxsize=n, on_drop=Frame.release),
+        ]
+        captured, preprocessed, inferred, decided = self.queues
+        self.cameras = {camera_id: CameraSource(camera_id, source, captured, imgsz) for camera_id, source in sources}
+        # motion_gate is a factory so every camera gets its own reference frame.
+        self.gates = {camera_id: motion_gate() for camera_id in self.cameras} if motion_gate else {}
+        self._last_results = {}
+        self.stages = [
+            Stage("preprocess", captured, self._preprocess, preprocessed),
+            Stage("inference", preprocessed, self._infer, inferred, batch=True),
+            Stage("decide", inferred, self._decide, decided if render else None),
+        ]
+        self._running = False
+
+    def _preprocess(self, frame):
+        gate = self.gates.get(frame.camera_id)
+        if gate is not None:
+            frame.skipped = not gate.check(frame.image)
+        return frame
+
+    def _infer(self, frames):
+        pending = [frame for frame in frames if not frame.skipped or frame.camera_id not in self._last_results]
+        if pending:
+            results = self.model([frame.image for frame in pending], imgsz=self.imgsz, verbose=False)
+            for frame, result in zip(pending, results):
+                self._last_results[frame.camera_id] = result
+        for frame in frames:
+            frame.result = self._last_results[frame.camera_id]
+        return frames
+
+    def _decide(self, frame):
+        out = self.decide(frame)
+        self.cameras[frame.camera_id].stats.update(time.monotonic() - frame.captured_at)
+        if out is None or not self.render:
+            frame.release()
+            return None
+        return out
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        captured, _, _, decided = self.queues
+        for stage in self.stages:
+            stage.start()
+        for camera in self.cameras.values():
+            camera.start()
+
+        self._running = True
+        last_report = time.monotonic()
+        try:
+            while self._running:
+                if not captured.closed and all(camera.finished.is_set() for camera in self.cameras.values()):
+                    captured.close()
+
+                if self.render:
+                    for frame in decided.get_all(timeout=0.05):
+                        if self.render(frame) is False:
+                            self._running = False
+                        frame.release()
+                    if decided.closed:
+                        break
+                else:
+                    self.stages[-1].join(timeout=0.05)
+                    if not self.stages[-1].is_alive():
+                        break
+
+                now = time.monotonic()
+                if self.report_interval and now - last_report >= self.report_interval:
+                    self.report()
+                    last_report = now
+        finally:
+            for camera in self.cameras.values():
+                camera.stop()
+            captured.close()
+            for stage in self.stages:
+                stage.join(timeout=2)
+            self.report()
+
+    def report(self):
+        for camera_id, camera in self.cameras.items():
+            stats = camera.stats
+            line = f"[{camera_id}] {stats.fps:5.1f} FPS, latency {stats.latency_ms:6.1f} ms, {stats.frames} frames"
+            if camera_id in self.gates:
+                line += f", {self.gates[camera_id].skip_ratio:.0%} skipped by motion gate"
+            if camera.pool is not None and camera.pool.exhausted:
+                line += f", {camera.pool.exhausted} dropped with no free buffer"
+            print(line, file=sys.stderr)
+        drops = ", ".join(f"{queue.name} {queue.dropped}/{queue.received}" for queue in self.queues)
+        print(f"dropped frames per stage: {drops}", file=sys.stderr)
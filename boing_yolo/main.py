@@ -55,101 +55,169 @@
 
 
 
+import argparse
+from collections import defaultdict
 import cv2
 import cvzone
-import math
 import time
-import threading
 import os
-from twilio.rest import Client
+import sys
+
+# pygame greets on stdout when imported, and stdout is the JSON-lines stream.
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
 import pygame
-from ultralytics import YOLO
+
+from backends import BACKENDS, MODEL_PATH, load_model
+from engine import MultiCameraEngine
+from motion import MotionGate
+from postprocess import detections_array, person_candidates
+from sinks import JsonLinesSink
+from sos import HttpSender, SOSDispatcher, TwilioSender
+from tracker import FallTracker
 
 TWILIO_SID = ''
 TWILIO_AUTH_TOKEN = ''
 TWILIO_FROM_NUMBER = ''
 EMERGENCY_NUMBERS = ['']
 
-pygame.mixer.init()
+try:
+    pygame.mixer.init()
+except pygame.error as e:
+    # Rack servers usually have no audio device; fall back to console alerts.
+    print(f"Warning: No audio device ({e}). Will use console alert instead.", file=sys.stderr)
 ALARM_SOUND_PATH = "mixkit-retro-emergency-tones-2971.wav"
 if not os.path.exists(ALARM_SOUND_PATH):
-    print("Warning: Alarm sound file not found! Will use console alert instead.")
+    print("Warning: Alarm sound file not found! Will use console alert instead.", file=sys.stderr)
 
-def trigger_sos():
+def trigger_sos(camera_id, track_id=None):
     """Triggers an SOS alert with an alarm sound and SMS notification."""
-    print("\n*** FALL DETECTED! TRIGGERING SOS ALERT ***\n")
+    print("\n*** FALL DETECTED! TRIGGERING SOS ALERT ***\n", file=sys.stderr)
     
     try:
-        if os.path.exists(ALARM_SOUND_PATH):
+        if os.path.exists(ALARM_SOUND_PATH) and pygame.mixer.get_init():
             pygame.mixer.music.load(ALARM_SOUND_PATH)
             pygame.mixer.music.play()
         else:
             for _ in range(5):
-                print("🚨 EMERGENCY ALERT: FALL DETECTED! 🚨")
+                print("🚨 EMERGENCY ALERT: FALL DETECTED! 🚨", file=sys.stderr)
     except Exception as e:
-        print(f"Error playing alarm sound: {e}")
-
-    thread = threading.Thread(target=send_emergency_sms)
-    thread.daemon = True
-    thread.start()
+        print(f"Error playing alarm sound: {e}", file=sys.stderr)
 
-def send_emergency_sms():
-    """Sends emergency SMS using Twilio."""
-    try:
-        client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
-        for number in EMERGENCY_NUMBERS:
-            message = client.messages.create(
-                body="EMERGENCY ALERT: Fall detected! Immediate assistance may be required.",
-                from_=TWILIO_FROM_NUMBER,
-                to=number
-            )
-            print(f"Emergency SMS sent to {number}")
-    except Exception as e:
-        print(f"Error sending emergency SMS: {e}")
+    if dispatcher:
+        dispatcher.submit(camera_id, track_id)
 
 
-cap = cv2.VideoCapture('fall.mp4')
-model = YOLO('runs/detect/train7/weights/best.pt')
+# Created on startup; sends, deduplicates and rate-limits the SMS alerts.
+dispatcher = None
 
 
 classnames = []
 with open('classes.txt', 'r') as f:
     classnames = f.read().splitlines()
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-    frame = cv2.resize(frame, (980, 740))
-
-    results = model(frame)
-
-    for info in results:
-        parameters = info.boxes
-        for box in parameters:
-            x1, y1, x2, y2 = box.xyxy[0]
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            confidence = box.conf[0]
-            class_detect = box.cls[0]
-            class_detect = int(class_detect)
-            class_detect = classnames[class_detect]
-            conf = math.ceil(confidence * 100)
-
-            height = y2 - y1
-            width = x2 - x1
-            threshold = height - width
-
-            if conf > 80 and class_detect == 'person':
-                cvzone.cornerRect(frame, [x1, y1, width, height], l=30, rt=6)
-                cvzone.putTextRect(frame, f'{class_detect}', [x1 + 8, y1 - 12], thickness=2, scale=2)
-            
-            if threshold < 0:
-                cvzone.putTextRect(frame, 'Fall Detected', [50, 50], thickness=2, scale=2, colorR=(0, 0, 255))
-                trigger_sos()  
-    
-    cv2.imshow('Fall Detection', frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+PERSON_CLASS = classnames.index('person')
+DISPLAY_SIZE = (980, 740)
+
+# Set from the command line; None disables JSON event output.
+sink = None
+# One fall tracker per camera, created on its first frame.
+trackers = defaultdict(FallTracker)
+
+
+def decide(frame):
+    """Per-camera fall logic, run on the decision stage for every inferred frame."""
+    detections = detections_array(frame.result)
+    frame.people = person_candidates(detections, person_class=PERSON_CLASS)
+    frame.falls = trackers[frame.camera_id].update(
+        frame.people['box'].tolist(), frame.people['conf'].tolist(), frame.people['horizontal'].tolist())
+
+    if sink:
+        sink.emit('detections', camera=frame.camera_id, frame=frame.index, skipped=frame.skipped,
+                  size=[frame.image.shape[1], frame.image.shape[0]], boxes=detections.tolist())
+        for track in frame.falls:
+            sink.emit('fall', camera=frame.camera_id, frame=frame.index,
+                      track=track.id, box=track.box, conf=track.conf)
+
+    for track in frame.falls:
+        trigger_sos(frame.camera_id, track.id)
+    return frame
+
+
+def render(frame):
+    """Draws detections on a display-sized copy of the frame; returns False when the user quits."""
+    image = cv2.resize(frame.image, DISPLAY_SIZE)
+    sx = DISPLAY_SIZE[0] / frame.image.shape[1]
+    sy = DISPLAY_SIZE[1] / frame.image.shape[0]
+    for x1, y1, x2, y2 in frame.people['box'].tolist():
+        x1, y1, x2, y2 = int(x1 * sx), int(y1 * sy), int(x2 * sx), int(y2 * sy)
+        cvzone.cornerRect(image, [x1, y1, x2 - x1, y2 - y1], l=30, rt=6)
+        cvzone.putTextRect(image, 'person', [x1 + 8, y1 - 12], thickness=2, scale=2)
+
+    if frame.falls:
+        cvzone.putTextRect(image, 'Fall Detected', [50, 50], thickness=2, scale=2, colorR=(0, 0, 255))
+
+    cv2.imshow(f'Fall Detection - {frame.camera_id}', image)
+    return not (cv2.waitKey(1) & 0xFF == ord('q'))
+
+
+def parse_sources(values):
+    """Turns ``name=uri`` / ``uri`` arguments into ``(camera_id, source)`` pairs."""
+    sources = []
+    for i, value in enumerate(values):
+        name, sep, uri = value.partition('=')
+        if not sep:
+            name, uri = f'cam{i}', value
+        sources.append((name, int(uri) if uri.isdigit() else uri))
+    return sources
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='CCTV fall detection over one or more cameras.')
+    parser.add_argument('sources', nargs='*', default=['fall.mp4'],
+                        help='Video files, stream URLs or device indexes, optionally as name=uri.')
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--backend', choices=BACKENDS, default='torch',
+                        help='Inference runtime; non-torch backends need python backends.py first.')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help='Seconds between per-camera FPS/latency reports (0 to disable).')
+    parser.add_argument('--display', action='store_true',
+                        help='Annotate frames and show them in a window. Off by default (headless).')
+    parser.add_argument('--output', default=None,
+                        help='Write detections and fall events as JSON lines to "-" (stdout), '
+                             'tcp://host:port, udp://host:port or a file. Defaults to stdout when headless.')
+    parser.add_argument('--confirm-frames', type=int, default=5,
+                        help='Consecutive horizontal frames before a fall is confirmed.')
+    parser.add_argument('--cooldown', type=float, default=60.0,
+                        help='Seconds before the same person can raise another fall alert.')
+    parser.add_argument('--motion-gate', action='store_true',
+                        help='Skip inference on frames with no motion and reuse the last detections.')
+    parser.add_argument('--min-inference-rate', type=float, default=1.0,
+                        help='With --motion-gate, still run inference at least this often per second.')
+    parser.add_argument('--sms-gateway', default=None,
+                        help='POST alerts to this HTTP SMS gateway instead of Twilio (e.g. a local fake).')
+    parser.add_argument('--sms-concurrency', type=int, default=4,
+                        help='Maximum number of SMS sends in flight at once.')
+    args = parser.parse_args()
+
+    if args.sms_gateway:
+        sender = HttpSender(args.sms_gateway)
+    else:
+        sender = TwilioSender(TWILIO_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER)
+    dispatcher = SOSDispatcher(sender, EMERGENCY_NUMBERS, concurrency=args.sms_concurrency)
+
+    trackers.default_factory = lambda: FallTracker(confirm_frames=args.confirm_frames, cooldown=args.cooldown)
+    output = args.output if args.output is not None else (None if args.display else '-')
+    sink = JsonLinesSink(output) if output else None
+
+    model = load_model(args.weights, args.backend)
+    motion_gate = (lambda: MotionGate(min_rate=args.min_inference_rate)) if args.motion_gate else None
+    engine = MultiCameraEngine(model, parse_sources(args.sources), decide, render if args.display else None,
+                               imgsz=args.imgsz, report_interval=args.report_interval, motion_gate=motion_gate)
+    try:
+        engine.run()
+    finally:
+        dispatcher.close(timeout=30)
+        if sink:
+            sink.close()
+        if args.display:
+            cv2.destroyAllWindows()
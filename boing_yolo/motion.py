@@ -0,0 +1,78 @@
+import argparse
+import time
+
+import cv2
+
+
+class MotionGate:
+    """Cheap frame-differencing check that decides whether a frame needs inference.
+
+    Frames are shrunk to ``width`` pixels wide, greyscaled and blurred, then
+    compared against the frame from the last inference. If less than
+    ``min_changed`` of the pixels moved by more than ``pixel_threshold`` the
+    frame is skipped and the previous detections are reused. At least
+    ``min_rate`` inferences per second still go through, so a person who
+    stays still is still re-checked.
+    """
+
+    def __init__(self, width=160, pixel_threshold=25, min_changed=0.005, min_rate=1.0):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.max_interval = 1.0 / min_rate if min_rate > 0 else float('inf')
+        self.checked = 0
+        self.skipped = 0
+        self._reference = None
+        self._last_inference = 0.0
+
+    def _small(self, image):
+        h, w = image.shape[:2]
+        small = cv2.resize(image, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def check(self, image, now=None):
+        """Returns True if ``image`` should go through inference."""
+        now = time.monotonic() if now is None else now
+        gray = self._small(image)
+        self.checked += 1
+
+        run = self._reference is None or now - self._last_inference >= self.max_interval
+        if not run:
+            diff = cv2.absdiff(gray, self._reference)
+            _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+            run = cv2.countNonZero(mask) >= self.min_changed * mask.size
+
+        if run:
+            self._reference = gray
+            self._last_inference = now
+        else:
+            self.skipped += 1
+        return run
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.checked if self.checked else 0.0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report how many frames the motion gate would skip.')
+    parser.add_argument('videos', nargs='*', default=['fall.mp4', 'videoplayback.mp4'])
+    parser.add_argument('--min-changed', type=float, default=0.005)
+    parser.add_argument('--min-rate', type=float, default=1.0)
+    args = parser.parse_args()
+
+    for path in args.videos:
+        cap = cv2.VideoCapture(path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        gate = MotionGate(min_changed=args.min_changed, min_rate=args.min_rate)
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Use video time so the minimum rate means the same as in a live run.
+            gate.check(frame, now=index / fps)
+            index += 1
+        cap.release()
+        print(f"{path}: skipped {gate.skipped}/{gate.checked} frames ({gate.skip_ratio:.0%})")
@@ -0,0 +1,180 @@
+"""Offline fall analysis of recorded CCTV video.
+
+Each file is split into time chunks that worker processes decode and run
+through the model in batches. The workers only return raw detections; the
+fall tracker then runs over them in frame order in this process, on video
+time, so the event timeline is the same as a single sequential pass.
+
+    python offline.py archive/*.mp4 --workers 8 --output timeline.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from backends import BACKENDS, MODEL_PATH, load_model
+from buffers import input_size
+from postprocess import detections_array, person_candidates
+from tracker import FallTracker
+
+_model = None
+_imgsz = 640
+
+
+def _init_worker(weights, backend, imgsz, threads):
+    global _model, _imgsz
+    import torch
+
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(1)
+    _model = load_model(weights, backend)
+    _imgsz = imgsz
+
+
+def _run_batch(images):
+    results = _model(images, imgsz=_imgsz, verbose=False)
+    return [detections_array(result) for result in results]
+
+
+def _open_at(path, start):
+    """A capture positioned exactly on frame ``start``.
+
+    Seeking by CAP_PROP_POS_FRAMES can land off-target on some codecs and
+    containers, so when it does the file is reopened and frames are skipped
+    by grabbing them one at a time.
+    """
+    cap = cv2.VideoCapture(path)
+    if start and not (cap.set(cv2.CAP_PROP_POS_FRAMES, start) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start):
+        cap.release()
+        cap = cv2.VideoCapture(path)
+        for _ in range(start):
+            if not cap.grab():
+                break
+    return cap
+
+
+def detect_chunk(path, start, end, batch=8):
+    """Decodes frames ``[start, end)`` of ``path`` (to the end of the file when
+    ``end`` is None) and returns ``(start, detections)``, one array per frame."""
+    cap = _open_at(path, start)
+    detections, images = [], []
+    frame = None
+    index = start
+    while end is None or index < end:
+        ret, frame = cap.read(frame)
+        if not ret:
+            break
+        index += 1
+        images.append(cv2.resize(frame, input_size(frame.shape, _imgsz), interpolation=cv2.INTER_AREA))
+        if len(images) == batch:
+            detections.extend(_run_batch(images))
+            images = []
+    if images:
+        detections.extend(_run_batch(images))
+    cap.release()
+    return start, detections
+
+
+def chunks(path, chunk_seconds):
+    """Frame spans to decode. CAP_PROP_FRAME_COUNT is only an estimate for many
+    files, so the last span is open-ended and reads to the real end."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    step = max(1, int(chunk_seconds * fps))
+    starts = list(range(0, max(total, 1), step))
+    return fps, [(start, starts[i + 1] if i + 1 < len(starts) else None) for i, start in enumerate(starts)]
+
+
+def indexed_frames(path, spans, results):
+    """Pairs each chunk's detections with their frame numbers, counted from the
+    chunk's own start, and warns about any chunk that decoded short."""
+    for (_, end), (start, detections) in zip(spans, results):
+        if end is not None and len(detections) != end - start:
+            print(f"{path}: frames {start}-{end - 1}: decoded {len(detections)} of {end - start}; "
+                  f"the rest are missing from the analysis", file=sys.stderr)
+        for offset, frame_detections in enumerate(detections):
+            yield start + offset, frame_detections
+
+
+def fall_timeline(path, fps, frames, person_class, confirm_frames, cooldown):
+    """Runs the fall tracker over ``(frame index, detections)`` pairs in order, on video time."""
+    tracker = FallTracker(confirm_frames=confirm_frames, cooldown=cooldown)
+    events = []
+    for index, frame_detections in frames:
+        people = person_candidates(frame_detections, person_class=person_class)
+        seconds = index / fps
+        for track in tracker.update(people['box'].tolist(), people['conf'].tolist(),
+                                    people['horizontal'].tolist(), now=seconds):
+            events.append({
+                'file': path,
+                'frame': index,
+                'time': round(seconds, 3),
+                'timestamp': '%02d:%02d:%06.3f' % (seconds // 3600, seconds % 3600 // 60, seconds % 60),
+                'track': track.id,
+                'confidence': round(track.conf, 4),
+                'box': [round(v, 1) for v in track.box],
+            })
+    return events
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def write_timeline(events, output):
+    if output.endswith('.csv'):
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['file', 'frame', 'time', 'timestamp', 'track', 'confidence', 'box'])
+            writer.writeheader()
+            for event in events:
+                writer.writerow({**event, 'box': ' '.join(str(v) for v in event['box'])})
+    elif output == '-':
+        json.dump(events, sys.stdout, indent=2)
+        print()
+    else:
+        with open(output, 'w') as f:
+            json.dump(events, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan recorded video for falls.')
+    parser.add_argument('videos', nargs='+')
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--backend', choices=BACKENDS, default='torch')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-seconds', type=float, default=30.0)
+    parser.add_argument('--batch', type=positive_int, default=8)
+    parser.add_argument('--confirm-frames', type=int, default=5)
+    parser.add_argument('--cooldown', type=float, default=60.0)
+    parser.add_argument('--output', default='-', help='Timeline file (.json or .csv), or "-" for stdout.')
+    args = parser.parse_args()
+
+    with open('classes.txt', 'r') as f:
+        person_class = f.read().splitlines().index('person')
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    plan = {path: chunks(path, args.chunk_seconds) for path in args.videos}
+
+    events = []
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(args.weights, args.backend, args.imgsz, threads)) as pool:
+        futures = {
+            path: [pool.submit(detect_chunk, path, start, end, args.batch) for start, end in spans]
+            for path, (fps, spans) in plan.items()
+        }
+        for path, (fps, spans) in plan.items():
+            frames = list(indexed_frames(path, spans, (future.result() for future in futures[path])))
+            print(f"{path}: {len(frames)} frames analysed", file=sys.stderr)
+            events.extend(fall_timeline(path, fps, frames, person_class, args.confirm_frames, args.cooldown))
+
+    write_timeline(events, args.output)
@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import count
+
+
+@dataclass
+class Frame:
+    """One decoded frame as it moves through the pipeline stages."""
+
+    camera_id: str
+    index: int
+    captured_at: float
+    image: object
+    skipped: bool = False
+    result: object = None
+    people: object = None
+    falls: list = field(default_factory=list)
+    pool: object = None
+
+    def release(self):
+        """Hands the image buffer back to its pool once the frame is finished with."""
+        if self.pool is not None:
+            self.pool.release(self.image)
+            self.pool = None
+
+
+class LatestQueue:
+    """Bounded hand-off between two stages where the newest item always wins.
+
+    Items put under the same key replace each other, so a keyed queue holds at
+    most one pending frame per camera. Once ``maxsize`` items are waiting the
+    oldest is evicted. The producer never blocks; every replaced or evicted
+    item is counted in ``dropped`` and passed to ``on_drop``.
+    """
+
+    def __init__(self, name, maxsize=1, on_drop=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.received = 0
+        self.dropped = 0
+        self._items = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._seq = count()
+
+    def put(self, item, key=None):
+        evicted = []
+        with self._cond:
+            if key is None:
+                key = next(self._seq)
+            elif key in self._items:
+                evicted.append(self._items.pop(key))
+            if len(self._items) >= self.maxsize:
+                evicted.append(self._items.popitem(last=False)[1])
+            self._items[key] = item
+            self.received += 1
+            self.dropped += len(evicted)
+            self._cond.notify()
+        if self.on_drop is not None:
+            for old in evicted:
+                self.on_drop(old)
+
+    def get_all(self, timeout=None):
+        """Waits for at least one item and returns all waiting items, oldest first.
+
+        Returns an empty list on timeout or once the queue is closed and drained.
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            items = list(self._items.values())
+            self._items.clear()
+        return items
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        with self._cond:
+            return self._closed and not self._items
+
+
+class Stage(threading.Thread):
+    """Worker thread that moves frames from ``inbox`` through ``handle`` to ``outbox``.
+
+    With ``batch=True`` the handler receives every waiting frame at once and
+    returns a list; otherwise it is called per frame. Handlers return ``None``
+    (or leave a frame out of the list) to stop it from going further.
+    Closing the inbox drains the stage and then closes its outbox.
+    """
+
+    def __init__(self, name, inbox, handle, outbox=None, batch=False):
+        super().__init__(name=name, daemon=True)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.handle = handle
+        self.batch = batch
+        self.processed = 0
+
+    def run(self):
+        try:
+            while not self.inbox.closed:
+                frames = self.inbox.get_all(timeout=0.1)
+                if not frames:
+                    continue
+                if self.batch:
+                    out = self.handle(frames)
+                else:
+                    out = [self.handle(frame) for frame in frames]
+                self.processed += len(frames)
+                if self.outbox is not None:
+                    for frame in out:
+                        if frame is not None:
+                            self.outbox.put(frame, key=frame.camera_id)
+        finally:
+            if self.outbox is not None:
+                self.outbox.close()
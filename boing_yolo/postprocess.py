@@ -0,0 +1,37 @@
+import numpy as np
+
+# Person candidates for one frame: box is x1, y1, x2, y2 in frame pixels.
+CANDIDATE_DTYPE = np.dtype([
+    ('box', np.float32, (4,)),
+    ('conf', np.float32),
+    ('horizontal', np.bool_),
+])
+
+
+def detections_array(result):
+    """Copies a YOLO result's boxes to the host as one (N, 6) float32 array.
+
+    Columns are x1, y1, x2, y2, confidence, class — a single device-to-host
+    transfer instead of one per tensor element.
+    """
+    data = result.boxes.data
+    if hasattr(data, 'cpu'):
+        data = data.cpu().numpy()
+    return np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+
+def person_candidates(detections, person_class=0, min_conf=0.80):
+    """Filters an (N, 6) detections array down to confident person boxes.
+
+    ``conf > min_conf`` matches the old ``math.ceil(conf * 100) > 80`` gate.
+    The ``horizontal`` flag marks boxes wider than tall, the fall pose.
+    """
+    detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+    keep = (detections[:, 5] == person_class) & (detections[:, 4] > min_conf)
+    kept = detections[keep]
+
+    candidates = np.empty(len(kept), dtype=CANDIDATE_DTYPE)
+    candidates['box'] = kept[:, :4]
+    candidates['conf'] = kept[:, 4]
+    candidates['horizontal'] = (kept[:, 2] - kept[:, 0]) > (kept[:, 3] - kept[:, 1])
+    return candidates
@@ -0,0 +1,50 @@
+import json
+import socket
+import sys
+import threading
+import time
+
+
+class JsonLinesSink:
+    """Writes events as one JSON object per line.
+
+    ``target`` is ``-`` for stdout, ``tcp://host:port`` or ``udp://host:port``
+    for a socket, or a file path to append to.
+    """
+
+    def __init__(self, target='-'):
+        self.target = target
+        self._lock = threading.Lock()
+        self._sock = None
+        self._udp_addr = None
+
+        if target == '-':
+            self._stream = sys.stdout
+        elif target.startswith('tcp://'):
+            host, port = target[len('tcp://'):].rsplit(':', 1)
+            self._sock = socket.create_connection((host, int(port)))
+            self._stream = self._sock.makefile('w', encoding='utf-8')
+        elif target.startswith('udp://'):
+            host, port = target[len('udp://'):].rsplit(':', 1)
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._udp_addr = (host, int(port))
+            self._stream = None
+        else:
+            self._stream = open(target, 'a', encoding='utf-8')
+
+    def emit(self, event_type, **fields):
+        event = {'type': event_type, 'ts': time.time(), **fields}
+        line = json.dumps(event, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._udp_addr:
+                self._sock.sendto(line.encode('utf-8'), self._udp_addr)
+            else:
+                self._stream.write(line)
+                self._stream.flush()
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None and self._stream is not sys.stdout:
+                self._stream.close()
+            if self._sock is not None:
+                self._sock.close()
@@ -0,0 +1,191 @@
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+
+SOS_MESSAGE = "EMERGENCY ALERT: Fall detected! Immediate assistance may be required."
+
+
+def merge_bodies(bodies):
+    """One message for several alerts: the first alert's text plus a count."""
+    if len(bodies) == 1:
+        return bodies[0]
+    return f"{bodies[0]} ({len(bodies)} alerts)"
+
+
+class TwilioSender:
+    """Sends SMS through one Twilio client shared by every send."""
+
+    def __init__(self, sid, auth_token, from_number):
+        from twilio.rest import Client
+
+        self.client = Client(sid, auth_token)
+        self.from_number = from_number
+
+    def __call__(self, to, body):
+        self.client.messages.create(body=body, from_=self.from_number, to=to)
+
+
+class HttpSender:
+    """Posts ``To``/``Body`` form fields to an HTTP SMS gateway, e.g. a local fake."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, to, body):
+        data = urllib.parse.urlencode({'To': to, 'Body': body}).encode()
+        with urllib.request.urlopen(self.url, data=data, timeout=self.timeout) as response:
+            response.read()
+
+
+class SOSDispatcher:
+    """Long-lived, deduplicating dispatcher for fall alerts.
+
+    ``submit`` only enqueues. One worker thread applies the alert policy, and
+    a fixed pool of ``concurrency`` threads does the sends:
+
+    * the same ``(camera_id, track_id)`` alerts once per ``dedupe_window`` seconds
+    * a camera alerts at most once per ``camera_interval`` seconds
+    * a recipient gets at most one message per ``recipient_interval`` seconds
+    * failed sends are retried ``retries`` times with exponential backoff
+
+    Only exact repeats are dropped. An alert held back by a camera or
+    recipient limit waits and is merged into that camera's or recipient's
+    next message, and ``close`` sends anything still waiting.
+    """
+
+    def __init__(self, send, recipients, concurrency=4, dedupe_window=300.0, camera_interval=30.0,
+                 recipient_interval=30.0, retries=3, backoff=1.0, clock=time.monotonic, sleep=time.sleep):
+        self.send = send
+        self.recipients = [number for number in recipients if number]
+        self.dedupe_window = dedupe_window
+        self.camera_interval = camera_interval
+        self.recipient_interval = recipient_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+        self.merged = 0
+
+        self._events = {}
+        self._cameras = {}
+        self._recipients = {}
+        # Alerts accepted but held back by a camera or recipient limit.
+        self._waiting = set()
+        self._pending_cameras = {}
+        self._pending_recipients = {}
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix='sos-send')
+        self._worker = threading.Thread(target=self._run, name='sos-dispatch', daemon=True)
+        self._worker.start()
+
+    def submit(self, camera_id, track_id=None, body=SOS_MESSAGE):
+        self._queue.put((camera_id, track_id, body, self.clock()))
+
+    def close(self, timeout=None):
+        """Stops accepting alerts and waits up to ``timeout`` seconds for queued ones to be sent.
+
+        Alerts still held back by a rate limit are sent straight away rather than dropped.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._queue.put(None)
+        self._worker.join(timeout)
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._pool.shutdown(wait=False)
+
+    def _run(self):
+        while True:
+            due = self._next_due()
+            try:
+                item = self._queue.get(timeout=None if due is None else max(0.0, due - self.clock()))
+            except queue.Empty:
+                self._flush(self.clock())
+                continue
+            if item is None:
+                self._flush(self.clock(), force=True)
+                return
+            camera_id, track_id, body, now = item
+            self._accept(camera_id, track_id, body, now)
+            self._flush(now)
+
+    def _accept(self, camera_id, track_id, body, now):
+        if len(self._events) > 1000:
+            self._events = {key: t for key, t in self._events.items() if now - t < self.dedupe_window}
+        key = (camera_id, track_id)
+        last = self._events.get(key)
+        if key in self._waiting or (last is not None and now - last < self.dedupe_window):
+            self.suppressed += 1
+            return
+        self._waiting.add(key)
+        self._pending_cameras.setdefault(camera_id, []).append((track_id, body))
+
+    def _next_due(self):
+        due = [self._cameras[camera_id] + self.camera_interval for camera_id in self._pending_cameras]
+        due += [self._recipients[number] + self.recipient_interval for number in self._pending_recipients]
+        return min(due, default=None)
+
+    def _flush(self, now, force=False):
+        """Sends every waiting alert whose camera and recipient limits have expired."""
+        for camera_id in list(self._pending_cameras):
+            last = self._cameras.get(camera_id)
+            if not (force or last is None or now - last >= self.camera_interval):
+                continue
+            alerts = self._pending_cameras.pop(camera_id)
+            self._cameras[camera_id] = now
+            for track_id, _ in alerts:
+                self._waiting.discard((camera_id, track_id))
+                self._events[(camera_id, track_id)] = now
+            for number in self.recipients:
+                self._pending_recipients.setdefault(number, []).extend(body for _, body in alerts)
+
+        for number in list(self._pending_recipients):
+            last = self._recipients.get(number)
+            if not (force or last is None or now - last >= self.recipient_interval):
+                continue
+            bodies = self._pending_recipients.pop(number)
+            self._recipients[number] = now
+            self.merged += len(bodies) - 1
+            self._schedule(number, merge_bodies(bodies))
+
+    def _schedule(self, number, body):
+        try:
+            future = self._pool.submit(self._send_with_retry, number, body)
+        except RuntimeError:
+            print(f"Emergency SMS to {number} not sent: dispatcher closed", file=sys.stderr)
+            return
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._sent)
+
+    def _sent(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _send_with_retry(self, number, body):
+        for attempt in range(self.retries + 1):
+            try:
+                self.send(number, body)
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"Error sending emergency SMS to {number}: {e}", file=sys.stderr)
+                    with self._lock:
+                        self.failed += 1
+                    return
+                self.sleep(self.backoff * 2 ** attempt)
+            else:
+                print(f"Emergency SMS sent to {number}", file=sys.stderr)
+                with self._lock:
+                    self.sent += 1
+                return
@@ -0,0 +1,51 @@
+import threading
+import unittest
+
+from pipeline import LatestQueue
+
+
+class LatestQueueTestCase(unittest.TestCase):
+    def test_same_key_replaces_and_counts_the_drop(self):
+        dropped = []
+        queue = LatestQueue('test', maxsize=4, on_drop=dropped.append)
+        queue.put('cam1-a', key='cam1')
+        queue.put('cam2-a', key='cam2')
+        queue.put('cam1-b', key='cam1')
+        self.assertEqual(queue.get_all(timeout=0), ['cam2-a', 'cam1-b'])
+        self.assertEqual(dropped, ['cam1-a'])
+        self.assertEqual((queue.received, queue.dropped), (3, 1))
+
+    def test_evicts_oldest_once_full(self):
+        dropped = []
+        queue = LatestQueue('test', maxsize=2, on_drop=dropped.append)
+        for item in 'abc':
+            queue.put(item)
+        self.assertEqual(queue.get_all(timeout=0), ['b', 'c'])
+        self.assertEqual(dropped, ['a'])
+
+    def test_get_all_times_out_empty(self):
+        self.assertEqual(LatestQueue('test').get_all(timeout=0.01), [])
+
+    def test_get_all_wakes_on_put(self):
+        queue = LatestQueue('test')
+        threading.Timer(0.05, queue.put, args=('frame',)).start()
+        self.assertEqual(queue.get_all(timeout=5), ['frame'])
+
+    def test_close_drains_before_reporting_closed(self):
+        queue = LatestQueue('test', maxsize=2)
+        queue.put('last')
+        queue.close()
+        self.assertFalse(queue.closed)
+        self.assertEqual(queue.get_all(timeout=5), ['last'])
+        self.assertTrue(queue.closed)
+        self.assertEqual(queue.get_all(timeout=5), [])
+
+    def test_close_wakes_a_waiting_consumer(self):
+        queue = LatestQueue('test')
+        threading.Timer(0.05, queue.close).start()
+        self.assertEqual(queue.get_all(timeout=5), [])
+        self.assertTrue(queue.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import math
+import unittest
+
+import numpy as np
+
+from postprocess import person_candidates
+
+PERSON = 0
+
+
+def per_box_filter(detections):
+    """The filter main.py applied box by box before post-processing was vectorized."""
+    people = []
+    for x1, y1, x2, y2, confidence, class_detect in detections:
+        if math.ceil(confidence * np.float32(100)) > 80 and int(class_detect) == PERSON:
+            people.append(((int(x1), int(y1), int(x2), int(y2)), float(confidence)))
+    return people
+
+
+class PersonCandidatesTestCase(unittest.TestCase):
+    def test_matches_the_per_box_filter(self):
+        rng = np.random.default_rng(0)
+        n = 5000
+        xy = rng.integers(0, 900, (n, 2))
+        wh = rng.integers(10, 300, (n, 2))
+        conf = rng.random(n).astype(np.float32)
+        conf[:4] = [0.8, np.nextafter(np.float32(0.8), np.float32(1)), 0.81, 0.79]
+        cls = rng.integers(0, 3, n)
+        detections = np.column_stack([xy, xy + wh, conf, cls]).astype(np.float32)
+
+        candidates = person_candidates(detections, person_class=PERSON)
+        expected = per_box_filter(detections)
+        self.assertEqual(
+            [(tuple(int(v) for v in box), float(c)) for box, c in zip(candidates['box'], candidates['conf'])],
+            expected,
+        )
+        self.assertEqual(
+            candidates['horizontal'].tolist(),
+            [x2 - x1 > y2 - y1 for (x1, y1, x2, y2), _ in expected],
+        )
+
+    def test_no_detections(self):
+        candidates = person_candidates(np.empty((0, 6), dtype=np.float32))
+        self.assertEqual(len(candidates), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
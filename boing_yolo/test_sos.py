@@ -0,0 +1,116 @@
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sos import SOS_MESSAGE, HttpSender, SOSDispatcher
+
+
+class FakeSMSHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.attempts += 1
+            failing = server.attempts <= server.fail_first
+            if not failing:
+                server.messages.append(urllib.parse.parse_qs(body.decode()))
+        self.send_response(500 if failing else 201)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SOSDispatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeSMSHandler)
+        self.server.lock = threading.Lock()
+        self.server.attempts = 0
+        self.server.fail_first = 0
+        self.server.messages = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.sender = HttpSender(f'http://127.0.0.1:{self.server.server_port}/sms')
+        self.now = 0.0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def dispatcher(self, **kwargs):
+        return SOSDispatcher(self.sender, ['+100', '+200'], clock=lambda: self.now, sleep=lambda s: None, **kwargs)
+
+    def recipients(self):
+        return sorted(message['To'][0] for message in self.server.messages)
+
+    def test_sends_to_every_recipient(self):
+        dispatcher = self.dispatcher()
+        dispatcher.submit('cam0', 1)
+        dispatcher.close()
+        self.assertEqual(self.recipients(), ['+100', '+200'])
+        self.assertEqual(dispatcher.sent, 2)
+
+    def test_repeated_event_is_deduplicated(self):
+        dispatcher = self.dispatcher()
+        for _ in range(50):
+            dispatcher.submit('cam0', 1)
+        dispatcher.close()
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(dispatcher.suppressed, 49)
+
+    def bodies(self, to):
+        # Sorted: the pool sends concurrently, so arrival order isn't fixed.
+        return sorted(message['Body'][0] for message in self.server.messages if message['To'][0] == to)
+
+    def test_rate_limited_alerts_are_merged_not_dropped(self):
+        dispatcher = self.dispatcher(camera_interval=30, recipient_interval=60)
+        dispatcher.submit('cam0', 1)
+        dispatcher.submit('cam0', 2)   # same camera, too soon: waits for the camera
+        self.now = 40.0
+        dispatcher.submit('cam1', 3)   # new camera, but recipients were just messaged: waits
+        self.now = 100.0
+        dispatcher.submit('cam0', 4)
+        dispatcher.close()
+        self.assertEqual(self.recipients(), ['+100', '+100', '+200', '+200'])
+        self.assertEqual(self.bodies('+100'), [SOS_MESSAGE, f'{SOS_MESSAGE} (3 alerts)'])
+        self.assertEqual((dispatcher.suppressed, dispatcher.merged), (0, 4))
+
+    def test_held_back_alert_does_not_count_as_sent(self):
+        dispatcher = self.dispatcher(camera_interval=30, dedupe_window=300)
+        dispatcher.submit('cam0', 1)
+        dispatcher.submit('cam0', 2)   # held back by the camera limit
+        dispatcher.submit('cam0', 2)   # a repeat of the waiting alert
+        self.now = 35.0
+        dispatcher.submit('cam1', 9)
+        dispatcher.close()
+        self.assertEqual(dispatcher.suppressed, 1)
+        self.assertEqual(len(self.bodies('+100')), 2)
+        self.assertEqual(self.bodies('+100')[1], f'{SOS_MESSAGE} (2 alerts)')
+
+    def test_close_sends_alerts_still_waiting(self):
+        dispatcher = self.dispatcher(camera_interval=30)
+        dispatcher.submit('cam0', 1)
+        dispatcher.submit('cam0', 2)
+        dispatcher.close()
+        self.assertEqual(self.recipients(), ['+100', '+100', '+200', '+200'])
+
+    def test_failed_sends_are_retried(self):
+        self.server.fail_first = 2
+        dispatcher = SOSDispatcher(self.sender, ['+100'], retries=3, sleep=lambda s: None)
+        dispatcher.submit('cam0', 1)
+        dispatcher.close()
+        self.assertEqual(self.server.attempts, 3)
+        self.assertEqual(dispatcher.sent, 1)
+        self.assertEqual(dispatcher.failed, 0)
+
+    def test_gives_up_after_retries(self):
+        self.server.fail_first = 100
+        dispatcher = SOSDispatcher(self.sender, ['+100'], retries=2, sleep=lambda s: None)
+        dispatcher.submit('cam0', 1)
+        dispatcher.close()
+        self.assertEqual(self.server.attempts, 3)
+        self.assertEqual(dispatcher.failed, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from tracker import FallTracker
+
+STANDING = (100, 100, 140, 220)
+LYING = (60, 180, 180, 220)
+
+
+class FallTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tracker = FallTracker(confirm_frames=3, cooldown=60.0, max_missed=2)
+        self.now = 0.0
+
+    def step(self, *boxes):
+        self.now += 0.1
+        return self.tracker.update(list(boxes), [0.9] * len(boxes), now=self.now)
+
+    def test_fall_confirmed_after_confirm_frames(self):
+        self.step(STANDING)
+        self.assertEqual(self.step(LYING), [])
+        self.assertEqual(self.step(LYING), [])
+        falls = self.step(LYING)
+        self.assertEqual([track.id for track in falls], [1])
+
+    def test_keeps_identity_as_the_box_turns_wide(self):
+        self.step(STANDING)
+        self.step(LYING)
+        self.assertEqual([track.id for track in self.tracker.tracks], [1])
+
+    def test_no_realert_while_down_or_during_cooldown(self):
+        self.step(STANDING)
+        falls = [track.id for _ in range(20) for track in self.step(LYING)]
+        self.assertEqual(falls, [1])
+
+        # Gets up and falls again within the cooldown: still one alert.
+        self.step(STANDING)
+        self.assertEqual([track for _ in range(3) for track in self.step(LYING)], [])
+
+        self.now += 60.0
+        self.step(STANDING)
+        self.assertEqual([track.id for _ in range(3) for track in self.step(LYING)], [1])
+
+    def test_single_wide_frames_do_not_count(self):
+        for _ in range(5):
+            self.step(STANDING)
+            self.assertEqual(self.step(LYING), [])
+
+    def test_tracks_expire_after_max_missed(self):
+        self.step(STANDING)
+        self.step()
+        self.step()
+        self.assertEqual(len(self.tracker.tracks), 1)
+        self.step()
+        self.assertEqual(self.tracker.tracks, [])
+
+        self.step(STANDING)
+        self.assertEqual([track.id for track in self.tracker.tracks], [2])
+
+    def test_separate_people_are_tracked_separately(self):
+        far = tuple(v + 500 for v in STANDING)
+        far_lying = tuple(v + 500 for v in LYING)
+        self.step(STANDING, far)
+        for _ in range(2):
+            self.step(STANDING, far_lying)
+        falls = self.step(STANDING, far_lying)
+        self.assertEqual([track.id for track in falls], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import time
+
+
+def iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def centroid_distance(a, b):
+    """Distance between box centres, relative to the diagonal of ``a``."""
+    dx = (a[0] + a[2] - b[0] - b[2]) / 2
+    dy = (a[1] + a[3] - b[1] - b[3]) / 2
+    diag = ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5
+    return (dx * dx + dy * dy) ** 0.5 / diag if diag > 0 else float('inf')
+
+
+class Track:
+    def __init__(self, track_id, box, conf, horizontal):
+        self.id = track_id
+        self.box = box
+        self.conf = conf
+        self.horizontal = horizontal
+        self.missed = 0
+        self.horizontal_frames = 0
+        self.fallen = False
+        self.last_alert = None
+
+
+class FallTracker:
+    """Links person boxes across frames and confirms falls per track.
+
+    A track counts as fallen once its box has been wider than tall for
+    ``confirm_frames`` consecutive frames. Each track then raises at most one
+    fall event per ``cooldown`` seconds, however long the person stays down.
+    Boxes are matched greedily by IoU, falling back to centroid distance
+    because a box changes shape sharply while its person goes down.
+    """
+
+    def __init__(self, confirm_frames=5, cooldown=60.0, iou_threshold=0.3, max_centroid_distance=0.75, max_missed=15):
+        self.confirm_frames = confirm_frames
+        self.cooldown = cooldown
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 1
+
+    def _match(self, boxes):
+        pairs = []
+        for t, track in enumerate(self.tracks):
+            for d, box in enumerate(boxes):
+                overlap = iou(track.box, box)
+                if overlap >= self.iou_threshold:
+                    pairs.append((1 + overlap, t, d))
+                else:
+                    distance = centroid_distance(track.box, box)
+                    if distance <= self.max_centroid_distance:
+                        pairs.append((1 - distance, t, d))
+        pairs.sort(reverse=True)
+
+        matches, used_tracks, used_boxes = [], set(), set()
+        for _, t, d in pairs:
+            if t not in used_tracks and d not in used_boxes:
+                matches.append((t, d))
+                used_tracks.add(t)
+                used_boxes.add(d)
+        return matches, used_tracks, used_boxes
+
+    def update(self, boxes, confs, horizontal=None, now=None):
+        """Advances all tracks by one frame of person ``boxes`` (x1, y1, x2, y2).
+
+        ``horizontal`` optionally gives the precomputed wider-than-tall flag
+        per box. Returns the tracks whose fall was confirmed on this frame.
+        """
+        now = time.monotonic() if now is None else now
+        if horizontal is None:
+            horizontal = [x2 - x1 > y2 - y1 for x1, y1, x2, y2 in boxes]
+        matches, used_tracks, used_boxes = self._match(boxes)
+
+        for t, d in matches:
+            track = self.tracks[t]
+            track.box, track.conf, track.horizontal, track.missed = boxes[d], confs[d], horizontal[d], 0
+        for t, track in enumerate(self.tracks):
+            if t not in used_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        for d, box in enumerate(boxes):
+            if d not in used_boxes:
+                self.tracks.append(Track(self._next_id, box, confs[d], horizontal[d]))
+                self._next_id += 1
+
+        falls = []
+        for track in self.tracks:
+            if track.missed:
+                continue
+            if track.horizontal:
+                track.horizontal_frames += 1
+            else:
+                track.horizontal_frames = 0
+                track.fallen = False
+
+            if not track.fallen and track.horizontal_frames >= self.confirm_frames:
+                track.fallen = True
+                if track.last_alert is None or now - track.last_alert >= self.cooldown:
+                    track.last_alert = now
+                    falls.append(track)
+        return falls